@@ -0,0 +1,258 @@
+# Benchmarks of the backtest, signal and metrics hot paths
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import optuna
+
+from backtest import simulate_signals, params_backtest, walk_forward
+from indicators import build_indicator_bank, bank_cache
+from ingest import read_bars
+from metrics import evaluate_metrics, calmar_ratio
+from signals import strategy_signals, indicator_cache
+from utils import returns_table
+
+# Synthetic dataset sizes
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Fixed parameter set timed by the single-backtest stages
+PARAMS = {
+    'rsi_window': 14, 'rsi_lower': 30, 'rsi_upper': 70,
+    'ema_short_window': 20, 'ema_long_window': 150,
+    'macd_short_window': 12, 'macd_long_window': 120, 'macd_signal_window': 9,
+    'stop_loss': 0.05, 'take_profit': 0.05, 'available_cash_pct': 0.05,
+}
+
+def synthetic_ohlcv(n_bars: int, seed: int = 0, start: str = '2020-01-01', freq: str = '5min',
+                    price: float = 100., drift: float = 0., volatility: float = 0.002) -> pd.DataFrame:
+    """
+    Generate OHLCV bars from a geometric Brownian motion.
+
+    Parameters:
+        n_bars (int): Number of bars.
+        seed (int): Seed of the random generator, the same seed gives the same bars.
+        start (str): Time of the first bar.
+        freq (str): Bar frequency.
+        price (float): Initial price.
+        drift (float): Mean log return per bar.
+        volatility (float): Standard deviation of the log return per bar.
+
+    Returns:
+        pd.DataFrame: Bars in the canonical Datetime, Open, High, Low, Close, Volume layout.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    close = price * np.exp(np.cumsum(rng.normal(drift - volatility ** 2 / 2, volatility, n_bars)))
+    open_ = np.concatenate(([price], close[:-1]))
+    wick = np.abs(rng.normal(0, volatility / 2, (2, n_bars)))
+
+    return pd.DataFrame({
+        'Datetime': pd.date_range(start, periods=n_bars, freq=freq),
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + wick[0]),
+        'Low': np.minimum(open_, close) * (1 - wick[1]),
+        'Close': close,
+        'Volume': rng.lognormal(10, 1, n_bars),
+    })
+
+def _clear_caches():
+    # Every run starts cold, cached indicators would hide regressions
+    indicator_cache.clear()
+    bank_cache.clear()
+
+def measure(function, repeat: int = 3) -> dict:
+    """
+    Time a function and record its peak traced memory.
+
+    The timings run without tracing; one extra run under tracemalloc measures the peak memory,
+    since tracing slows NumPy and pandas down.
+
+    Parameters:
+        function (callable): Function without arguments.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: Median and minimum seconds, and peak memory in MiB.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': statistics.median(timings), 'min_seconds': min(timings), 'peak_mib': peak / 1024 ** 2}
+
+def _study(data: pd.DataFrame, n_trials: int, n_splits: int):
+    # Seeded sampler so every run evaluates the same trials
+    study = optuna.create_study(direction='maximize', sampler=optuna.samplers.TPESampler(seed=0))
+    study.optimize(lambda trial: walk_forward(data, trial, n_splits=n_splits), n_trials=n_trials)
+
+def benchmark_dataset(data: pd.DataFrame, repeat: int = 3, n_trials: int = 5, n_splits: int = 5) -> dict:
+    """
+    Benchmark every stage of the pipeline on one dataset.
+
+    Parameters:
+        data (pd.DataFrame): Market data.
+        repeat (int): Number of timed runs of each stage.
+        n_trials (int): Trials of the end-to-end walk-forward study (0 to skip it).
+        n_splits (int): Walk-forward splits of the study.
+
+    Returns:
+        dict: Stage name to its measurements.
+    """
+
+    buy_signals, sell_signals = strategy_signals(data, PARAMS, cache=None)
+    portfolio_value = pd.Series(params_backtest(data, PARAMS, cash=1_000_000)[1])
+
+    stages = {
+        'signals': lambda: strategy_signals(data, PARAMS, cache=None),
+        'indicator_bank': lambda: build_indicator_bank(data),
+        'simulate': lambda: simulate_signals(data, buy_signals, sell_signals, PARAMS, equity=False),
+        'params_backtest': lambda: params_backtest(data, PARAMS, cash=1_000_000),
+        'calmar_ratio': lambda: calmar_ratio(portfolio_value),
+        'evaluate_metrics': lambda: evaluate_metrics(portfolio_value),
+        'returns_table': lambda: returns_table(portfolio_value, data.dropna()),
+    }
+    if n_trials > 0:
+        stages['walk_forward_study'] = lambda: _study(data, n_trials, n_splits)
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    results = {}
+    for name, function in stages.items():
+        # A study is long enough to time once
+        results[name] = measure(function, repeat=1 if name == 'walk_forward_study' else repeat)
+
+    return results
+
+def run_benchmarks(sizes=tuple(SIZES), csv_paths=('data/aapl_5m_train.csv',), seed: int = 0, repeat: int = 3,
+                   n_trials: int = 5, n_splits: int = 5) -> dict:
+    """
+    Benchmark the synthetic datasets and the given CSV files.
+
+    Parameters:
+        sizes (tuple): Keys of SIZES to generate.
+        csv_paths (tuple): Bar files to benchmark (any format read by ingest.read_bars).
+        seed (int): Seed of the synthetic data.
+        repeat (int): Number of timed runs of each stage.
+        n_trials (int): Trials of the end-to-end walk-forward study.
+        n_splits (int): Walk-forward splits of the study.
+
+    Returns:
+        dict: Environment metadata and the results per dataset and stage.
+    """
+
+    datasets = {f'synthetic-{size}': lambda size=size: synthetic_ohlcv(SIZES[size], seed=seed) for size in sizes}
+    datasets.update({path: lambda path=path: read_bars(path).dropna().reset_index(drop=True) for path in csv_paths})
+
+    results = {}
+    for name, load in datasets.items():
+        data = load()
+        print(f"Benchmarking {name} ({len(data)} bars)", file=sys.stderr)
+        results[name] = {'bars': len(data), 'stages': benchmark_dataset(data, repeat, n_trials, n_splits)}
+
+    return {
+        'meta': {
+            'time': pd.Timestamp.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'seed': seed,
+            'repeat': repeat,
+            'n_trials': n_trials,
+        },
+        'results': results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = 0.2) -> list[dict]:
+    """
+    Find the stages that got slower than the baseline.
+
+    Parameters:
+        current (dict): Results of run_benchmarks.
+        baseline (dict): Stored results of an earlier run.
+        threshold (float): Allowed slowdown as a fraction (0.2 flags stages more than 20% slower).
+
+    Returns:
+        list[dict]: One entry per regressed stage, with both timings and the ratio.
+    """
+
+    regressions = []
+    for dataset, result in current['results'].items():
+        baseline_stages = baseline.get('results', {}).get(dataset, {}).get('stages', {})
+        for stage, measurement in result['stages'].items():
+            if stage not in baseline_stages:
+                continue
+            reference = baseline_stages[stage]['seconds']
+            ratio = measurement['seconds'] / reference if reference > 0 else float('inf')
+            if ratio > 1 + threshold:
+                regressions.append({'dataset': dataset, 'stage': stage, 'baseline_seconds': reference,
+                                    'seconds': measurement['seconds'], 'ratio': ratio})
+
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the backtest, signal and metrics hot paths.')
+    parser.add_argument('--sizes', nargs='*', default=list(SIZES), choices=list(SIZES), help='Synthetic dataset sizes')
+    parser.add_argument('--csv', nargs='*', default=['data/aapl_5m_train.csv'], help='Bar CSV files to benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage')
+    parser.add_argument('--trials', type=int, default=5, help='Trials of the walk-forward study (0 to skip)')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write the results to')
+    parser.add_argument('--baseline', default=None, help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown against the baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline file instead of comparing')
+    args = parser.parse_args(argv)
+    if args.save_baseline and args.baseline is None:
+        parser.error('--save-baseline requires --baseline')
+    return args
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.csv, args.seed, args.repeat, args.trials)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    rows = [(dataset, stage, m['seconds'], m['peak_mib'])
+            for dataset, result in results['results'].items() for stage, m in result['stages'].items()]
+    print(pd.DataFrame(rows, columns=['Dataset', 'Stage', 'Seconds', 'Peak MiB']).to_string(index=False))
+
+    if args.baseline is None:
+        return 0
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['dataset']} {r['stage']}: {r['seconds']:.4f}s vs {r['baseline_seconds']:.4f}s ({r['ratio']:.2f}x)")
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
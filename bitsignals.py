@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+@dataclass
+class PackedSignals:
+    """
+    A class to hold boolean signals as bits, eight bars per byte.
+
+    bits has shape (n_bytes,) for one signal or (n_signals, n_bytes) for a matrix of variants
+    (e.g. one row per parameter set), bar t of a row being bit t % 8 of byte t // 8. The padding
+    bits of the last byte are always zero, so bitwise operations and counts work on whole bytes.
+    """
+
+    bits: np.ndarray
+    n_bars: int
+
+    def __len__(self) -> int:
+        return self.n_bars
+
+    @property
+    def shape(self) -> tuple:
+        return (*self.bits.shape[:-1], self.n_bars)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def __getitem__(self, rows) -> 'PackedSignals':
+        # Rows of a matrix, the bars are selected with unpack()
+        return PackedSignals(self.bits[rows], self.n_bars)
+
+    def unpack(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """
+        Convert bars [start, stop) back to boolean values.
+
+        Parameters:
+            start (int): First bar.
+            stop (int | None): End bar (excluded), the last bar by default.
+
+        Returns:
+            np.ndarray: Boolean array of shape (stop - start,) or (n_signals, stop - start).
+        """
+
+        stop = self.n_bars if stop is None else min(stop, self.n_bars)
+        first_byte = start // 8
+        values = np.unpackbits(self.bits[..., first_byte:-(-stop // 8)], axis=-1, bitorder='little')
+        offset = start - 8 * first_byte
+
+        return values[..., offset:offset + stop - start].view(bool)
+
+    def count(self):
+        """
+        Number of True bars of each signal.
+        """
+
+        return np.bitwise_count(self.bits).sum(axis=-1, dtype=np.int64)
+
+    def shift(self) -> 'PackedSignals':
+        """
+        Shift the signals one bar forward, the first bar becomes False (like pd.Series.shift on NaN).
+        """
+
+        shifted = self.bits << 1
+        shifted[..., 1:] |= self.bits[..., :-1] >> 7
+
+        return PackedSignals(self._clear_padding(shifted), self.n_bars)
+
+    def __and__(self, other: 'PackedSignals') -> 'PackedSignals':
+        return PackedSignals(self.bits & self._bits_of(other), self.n_bars)
+
+    def __or__(self, other: 'PackedSignals') -> 'PackedSignals':
+        return PackedSignals(self.bits | self._bits_of(other), self.n_bars)
+
+    def __xor__(self, other: 'PackedSignals') -> 'PackedSignals':
+        return PackedSignals(self.bits ^ self._bits_of(other), self.n_bars)
+
+    def __invert__(self) -> 'PackedSignals':
+        return PackedSignals(self._clear_padding(~self.bits), self.n_bars)
+
+    def _bits_of(self, other: 'PackedSignals') -> np.ndarray:
+        if other.n_bars != self.n_bars:
+            raise ValueError(f"Signals of {self.n_bars} and {other.n_bars} bars cannot be combined")
+        return other.bits
+
+    def _clear_padding(self, bits: np.ndarray) -> np.ndarray:
+        if self.n_bars % 8:
+            bits[..., -1] &= (1 << (self.n_bars % 8)) - 1
+        return bits
+
+def pack(signals) -> PackedSignals:
+    """
+    Pack boolean signals into bits.
+
+    Parameters:
+        signals (array-like): Boolean values, shape (n_bars,) or (n_signals, n_bars).
+
+    Returns:
+        PackedSignals: Packed signals, 1/8 of the memory of a boolean array.
+    """
+
+    values = np.asarray(signals, dtype=bool)
+
+    return PackedSignals(np.packbits(values, axis=-1, bitorder='little'), values.shape[-1])
+
+def vote(signals: list[PackedSignals], k: int) -> PackedSignals:
+    """
+    Bars where at least k of the signals are True.
+
+    The votes are counted with bitwise operations on the packed bytes: after each signal,
+    at_least[j] holds the bars with j or more True signals so far.
+
+    Parameters:
+        signals (list[PackedSignals]): Signals of the same number of bars (and rows).
+        k (int): Number of signals that must agree.
+
+    Returns:
+        PackedSignals: Agreement of the signals.
+    """
+
+    first = signals[0]
+    if k <= 0:
+        return ~PackedSignals(np.zeros_like(first.bits), first.n_bars)
+
+    at_least = [None] * (k + 1)
+    for n, signal in enumerate(signals):
+        for j in range(min(k, n + 1), 0, -1):
+            reached = signal if j == 1 else at_least[j - 1] & signal
+            at_least[j] = reached if at_least[j] is None else at_least[j] | reached
+
+    if at_least[k] is None:
+        return PackedSignals(np.zeros_like(first.bits), first.n_bars)
+
+    return at_least[k]
+
+def crossover(fast, slow) -> PackedSignals:
+    """
+    Bars where fast crosses above slow: above on this bar, at or below on the previous one.
+
+    Bars where either series is NaN never cross, as with the pandas comparisons in signals.ema_signals.
+
+    Parameters:
+        fast (array-like): Values of the fast line, shape (n_bars,) or (n_signals, n_bars).
+        slow (array-like): Values of the slow line, same shape or broadcastable.
+
+    Returns:
+        PackedSignals: Crossing bars.
+    """
+
+    fast, slow = np.asarray(fast, dtype=float), np.asarray(slow, dtype=float)
+
+    return pack(fast > slow) & pack(fast <= slow).shift()
+
+def crossunder(fast, slow) -> PackedSignals:
+    """
+    Bars where fast crosses below slow: below on this bar, at or above on the previous one.
+
+    Parameters:
+        fast (array-like): Values of the fast line, shape (n_bars,) or (n_signals, n_bars).
+        slow (array-like): Values of the slow line, same shape or broadcastable.
+
+    Returns:
+        PackedSignals: Crossing bars.
+    """
+
+    fast, slow = np.asarray(fast, dtype=float), np.asarray(slow, dtype=float)
+
+    return pack(fast < slow) & pack(fast >= slow).shift()
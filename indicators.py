@@ -0,0 +1,241 @@
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import ta
+
+from signals import IndicatorCache, data_fingerprint, combined_signals
+
+# Windows covered by the optimization search space
+EMA_WINDOWS = list(range(5, 51)) + list(range(100, 301))
+RSI_WINDOWS = list(range(5, 51))
+
+@dataclass
+class IndicatorBank:
+    """
+    A class to hold every EMA and RSI window of the search space as one 2-D array per family.
+
+    Row i of ema (rsi) holds the indicator for ema_windows[i] (rsi_windows[i]) over all bars,
+    so a trial's signal generation is a couple of row lookups plus comparisons.
+    """
+
+    ema_windows: np.ndarray
+    ema: np.ndarray
+    rsi_windows: np.ndarray
+    rsi: np.ndarray
+
+    def __post_init__(self):
+        self._ema_rows = {int(w): i for i, w in enumerate(self.ema_windows)}
+        self._rsi_rows = {int(w): i for i, w in enumerate(self.rsi_windows)}
+
+    def __len__(self) -> int:
+        return self.ema.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.ema.nbytes + self.rsi.nbytes
+
+    def ema_row(self, window: int) -> np.ndarray:
+        """
+        EMA of the close prices for the given window.
+        """
+
+        if window not in self._ema_rows:
+            raise KeyError(f"EMA window {window} is not in the indicator bank")
+        return self.ema[self._ema_rows[window]]
+
+    def rsi_row(self, window: int) -> np.ndarray:
+        """
+        RSI of the close prices for the given window.
+        """
+
+        if window not in self._rsi_rows:
+            raise KeyError(f"RSI window {window} is not in the indicator bank")
+        return self.rsi[self._rsi_rows[window]]
+
+    def signals(self, params: dict):
+        """
+        Generate the combined buy and sell signals for a full set of strategy parameters.
+
+        The result is identical to signals.strategy_signals on the same data.
+
+        Parameters:
+            params (dict): Dictionary of hyperparameters.
+
+        Returns:
+            tuple: (buy_signal, sell_signal) as np.ndarray of boolean values.
+        """
+
+        # RSI (fixed thresholds)
+        rsi = self.rsi_row(params['rsi_window'])
+        rsi_buy = rsi < params['rsi_lower']
+        rsi_sell = rsi > params['rsi_upper']
+
+        # EMA (crossover)
+        short_ema = self.ema_row(params['ema_short_window'])
+        long_ema = self.ema_row(params['ema_long_window'])
+        ema_buy = (short_ema > long_ema) & _shift(short_ema <= long_ema)
+        ema_sell = (short_ema < long_ema) & _shift(short_ema >= long_ema)
+
+        # MACD (fixed): only the signal line EMA depends on the signal window
+        macd_line = self.ema_row(params['macd_short_window']) - self.ema_row(params['macd_long_window'])
+        signal_window = params['macd_signal_window']
+        signal_line = pd.Series(macd_line).ewm(span=signal_window, min_periods=signal_window, adjust=False).mean().to_numpy()
+        macd_buy = macd_line > signal_line
+        macd_sell = macd_line < signal_line
+
+        return combined_signals(rsi_buy, rsi_sell, ema_buy, ema_sell, macd_buy, macd_sell)
+
+def _shift(condition: np.ndarray) -> np.ndarray:
+    """
+    Shift a boolean array one bar forward, the first bar becomes False (like pd.Series.shift on NaN).
+    """
+
+    shifted = np.zeros_like(condition)
+    shifted[1:] = condition[:-1]
+    return shifted
+
+def build_indicator_bank(data: pd.DataFrame, ema_windows=EMA_WINDOWS, rsi_windows=RSI_WINDOWS, path: str | None = None) -> IndicatorBank:
+    """
+    Precompute every EMA and RSI window for the given data.
+
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices.
+        ema_windows (list[int]): EMA windows to compute (also used for the MACD fast and slow lines).
+        rsi_windows (list[int]): RSI windows to compute.
+        path (str | None): Directory to save the bank to as .npy files, reopened memory-mapped. The
+            indicators are written straight to the files, so the bank never has to fit in memory.
+
+    Returns:
+        IndicatorBank: Precomputed indicators.
+    """
+
+    close = data.Close
+    ema_windows = np.asarray(ema_windows, dtype=np.int64)
+    rsi_windows = np.asarray(rsi_windows, dtype=np.int64)
+
+    if path is None:
+        ema = np.empty((len(ema_windows), len(close)))
+        rsi = np.empty((len(rsi_windows), len(close)))
+    else:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'ema_windows.npy'), ema_windows)
+        np.save(os.path.join(path, 'rsi_windows.npy'), rsi_windows)
+        ema = np.lib.format.open_memmap(os.path.join(path, 'ema.npy'), mode='w+', dtype=np.float64, shape=(len(ema_windows), len(close)))
+        rsi = np.lib.format.open_memmap(os.path.join(path, 'rsi.npy'), mode='w+', dtype=np.float64, shape=(len(rsi_windows), len(close)))
+
+    for i, window in enumerate(ema_windows):
+        ema[i] = ta.trend.EMAIndicator(close, window=int(window)).ema_indicator().to_numpy()
+
+    for i, window in enumerate(rsi_windows):
+        rsi[i] = ta.momentum.RSIIndicator(close, window=int(window)).rsi().to_numpy()
+
+    if path is None:
+        return IndicatorBank(ema_windows, ema, rsi_windows, rsi)
+
+    ema.flush()
+    rsi.flush()
+    del ema, rsi
+
+    return load_indicator_bank(path)
+
+def save_indicator_bank(bank: IndicatorBank, path: str):
+    """
+    Save an indicator bank as .npy files in a directory.
+
+    Parameters:
+        bank (IndicatorBank): Indicator bank to save.
+        path (str): Target directory.
+
+    Returns:
+        None
+    """
+
+    os.makedirs(path, exist_ok=True)
+    for name in ('ema_windows', 'ema', 'rsi_windows', 'rsi'):
+        np.save(os.path.join(path, f'{name}.npy'), getattr(bank, name))
+
+def load_indicator_bank(path: str, mmap: bool = True) -> IndicatorBank:
+    """
+    Load an indicator bank saved with save_indicator_bank.
+
+    Parameters:
+        path (str): Directory holding the .npy files.
+        mmap (bool): Memory-map the indicator arrays instead of reading them into memory.
+
+    Returns:
+        IndicatorBank: Loaded indicator bank.
+    """
+
+    mmap_mode = 'r' if mmap else None
+    return IndicatorBank(
+        ema_windows=np.load(os.path.join(path, 'ema_windows.npy')),
+        ema=np.load(os.path.join(path, 'ema.npy'), mmap_mode=mmap_mode),
+        rsi_windows=np.load(os.path.join(path, 'rsi_windows.npy')),
+        rsi=np.load(os.path.join(path, 'rsi.npy'), mmap_mode=mmap_mode),
+    )
+
+# Banks of the datasets (and walk-forward folds) seen by this process
+bank_cache = IndicatorCache(max_bytes=2 * 1024 ** 3)
+
+# Memory-mapped banks too large for bank_cache, one subdirectory per data fingerprint
+BANK_DIR = os.path.join('data', '.cache', 'banks')
+
+# Serializes the builds of disk banks, so threads of a study build each one once
+_disk_bank_lock = threading.Lock()
+
+def bank_nbytes(n_bars: int, ema_windows=EMA_WINDOWS, rsi_windows=RSI_WINDOWS) -> int:
+    """
+    Memory taken by the indicator bank of n_bars bars.
+    """
+
+    return (len(ema_windows) + len(rsi_windows)) * n_bars * 8
+
+def get_indicator_bank(data: pd.DataFrame, cache: IndicatorCache = bank_cache, path: str | None = None,
+                       working_set_bars: int | None = None) -> IndicatorBank:
+    """
+    Return the indicator bank for the given data, building it on first use.
+
+    Banks are kept in memory when every bank used together fits in the cache; otherwise the LRU
+    would evict one on every fold and each trial would rebuild them all. Larger working sets (above
+    about 900k bars in total with the default 2 GiB cache), or every bank when path is given, are
+    built once into a memory-mapped directory named after the data fingerprint and reopened from
+    there by later trials and runs.
+
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices (a full dataset or a walk-forward fold).
+        cache (IndicatorCache): Cache holding the in-memory banks.
+        path (str | None): Directory of the memory-mapped banks, BANK_DIR for the banks too large
+            for the cache when None.
+        working_set_bars (int | None): Total bars of the banks used together with this one (e.g. every
+            walk-forward fold), len(data) by default.
+
+    Returns:
+        IndicatorBank: Precomputed indicators for the data.
+    """
+
+    fingerprint = data_fingerprint(data)
+
+    working_set_bars = len(data) if working_set_bars is None else working_set_bars
+    if path is None and bank_nbytes(working_set_bars) <= cache.max_bytes:
+        return cache.get_or_compute((fingerprint, 'bank'), lambda: build_indicator_bank(data))
+
+    bank_path = os.path.join(path or BANK_DIR, fingerprint)
+
+    # Banks already on disk are loaded without waiting for other builds
+    if not os.path.exists(bank_path):
+        with _disk_bank_lock:
+            if not os.path.exists(bank_path):
+                # Built aside and renamed, so an interrupted build is never loaded
+                tmp_path = f'{bank_path}.tmp-{os.getpid()}'
+                build_indicator_bank(data, path=tmp_path)
+                try:
+                    os.replace(tmp_path, bank_path)
+                except OSError:
+                    # Another process finished the same bank first
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+
+    return load_indicator_bank(bank_path)
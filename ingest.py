@@ -0,0 +1,327 @@
+import json
+import os
+import shutil
+import warnings
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from utils import save_columns, load_columns
+
+# Canonical OHLCV layout produced by every schema adapter
+CANONICAL_COLUMNS = ['Datetime', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+@dataclass
+class SchemaAdapter:
+    """
+    A class to map a vendor CSV schema to the canonical OHLCV layout.
+    """
+
+    name: str
+    required: tuple
+    convert: Callable[[pd.DataFrame], pd.DataFrame]
+
+    def matches(self, columns) -> bool:
+        return all(column in columns for column in self.required)
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse date strings with one explicit format for the whole chunk.
+
+    The day-first and month-first guesses of the first value are both tried and the one that
+    parses the most values wins. Ties go to year-month-day for year-first text and to day-first
+    otherwise (what modify_data's dayfirst=True does), so chunks don't flip format on ambiguous dates.
+    """
+
+    if not values.notna().any():
+        return pd.to_datetime(values, errors='coerce')
+
+    first = str(values.dropna().iloc[0])
+    order = (False, True) if first[:4].isdigit() else (True, False)
+
+    best = None
+    for dayfirst in order:
+        with warnings.catch_warnings():
+            # pandas warns when dayfirst does not apply to the guessed format
+            warnings.simplefilter('ignore', UserWarning)
+            date_format = guess_datetime_format(first, dayfirst=dayfirst)
+        if date_format is None:
+            continue
+        parsed = pd.to_datetime(values, errors='coerce', format=date_format)
+        if best is None or parsed.notna().sum() > best.notna().sum():
+            best = parsed
+
+    return best if best is not None else pd.to_datetime(values, errors='coerce', dayfirst=True)
+
+def _binance(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Base asset volume is the first 'Volume <asset>' column
+    volume = next(column for column in chunk.columns if column.startswith('Volume '))
+
+    # Epoch timestamps (milliseconds in newer files) are exact and cheap to convert
+    if 'Unix' in chunk:
+        unit = 'ms' if chunk['Unix'].max() > 1e11 else 's'
+        datetimes = pd.to_datetime(chunk['Unix'], unit=unit)
+    else:
+        datetimes = _parse_dates(chunk['Date'])
+
+    return pd.DataFrame({
+        'Datetime': datetimes,
+        'Open': chunk['Open'],
+        'High': chunk['High'],
+        'Low': chunk['Low'],
+        'Close': chunk['Close'],
+        'Volume': chunk[volume],
+    })
+
+def _eodhd(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Unix seconds in UTC, cheaper and less ambiguous than parsing the Datetime text
+    return pd.DataFrame({
+        'Datetime': pd.to_datetime(chunk['Timestamp'], unit='s'),
+        'Open': chunk['Open'],
+        'High': chunk['High'],
+        'Low': chunk['Low'],
+        'Close': chunk['Close'],
+        'Volume': chunk['Volume'],
+    })
+
+def _canonical(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk[CANONICAL_COLUMNS].copy()
+    chunk['Datetime'] = pd.to_datetime(chunk['Datetime'], errors='coerce')
+    return chunk
+
+# Checked in order, the first adapter whose required columns are present is used
+SCHEMAS = {
+    'binance': SchemaAdapter('binance', ('Date', 'Open', 'High', 'Low', 'Close', 'tradecount'), _binance),
+    'eodhd': SchemaAdapter('eodhd', ('Timestamp', 'Gmtoffset', 'Open', 'High', 'Low', 'Close', 'Volume'), _eodhd),
+    'canonical': SchemaAdapter('canonical', tuple(CANONICAL_COLUMNS), _canonical),
+}
+
+def detect_schema(columns) -> SchemaAdapter:
+    """
+    Find the schema adapter for a set of CSV columns.
+
+    Parameters:
+        columns (list[str]): Column names of the CSV file.
+
+    Returns:
+        SchemaAdapter: Matching adapter.
+    """
+
+    for adapter in SCHEMAS.values():
+        if adapter.matches(columns):
+            return adapter
+
+    raise ValueError(f"No schema adapter matches the columns {list(columns)}")
+
+def read_bars(path: str) -> pd.DataFrame:
+    """
+    Read a whole bar file into the canonical layout, for files that fit in memory.
+
+    Parameters:
+        path (str): Parquet file, or CSV file in any schema of SCHEMAS.
+
+    Returns:
+        pd.DataFrame: Canonical bars in time order.
+    """
+
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+
+    data = pd.read_csv(path)
+    data = detect_schema(data.columns).convert(data)
+
+    return data.sort_values('Datetime', kind='stable').reset_index(drop=True)
+
+class ColumnStore:
+    """
+    A class for an append-only store of canonical bars, one directory of .npy columns per partition.
+
+    The manifest lists the committed partitions in time order; partitions written but not yet
+    listed (e.g. after a crash mid-ingestion) are ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._manifest_path = os.path.join(path, 'manifest.json')
+        os.makedirs(path, exist_ok=True)
+
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'columns': CANONICAL_COLUMNS, 'partitions': [], 'rows': 0, 'last_time': None, 'next_id': 0}
+
+    def __len__(self) -> int:
+        return self.manifest['rows']
+
+    @property
+    def last_time(self) -> pd.Timestamp | None:
+        last_time = self.manifest['last_time']
+        return pd.Timestamp(last_time) if last_time is not None else None
+
+    def write_partition(self, frame: pd.DataFrame) -> str:
+        """
+        Write a partition without committing it to the manifest.
+
+        Parameters:
+            frame (pd.DataFrame): Canonical bars, sorted by time.
+
+        Returns:
+            str: Name of the partition.
+        """
+
+        name = f"part-{self.manifest['next_id']:06d}"
+        self.manifest['next_id'] += 1
+        save_columns(frame.reset_index(drop=True), os.path.join(self.path, name))
+
+        return name
+
+    def commit(self, partitions: list[str], rows: int, last_time):
+        """
+        Append written partitions to the manifest, atomically.
+
+        Parameters:
+            partitions (list[str]): Partition names in time order.
+            rows (int): Number of rows they hold.
+            last_time: Latest timestamp in the store after the append.
+
+        Returns:
+            None
+        """
+
+        self.manifest['partitions'] += partitions
+        self.manifest['rows'] += rows
+        if last_time is not None:
+            self.manifest['last_time'] = pd.Timestamp(last_time).isoformat()
+
+        tmp_path = f'{self._manifest_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def iter_partitions(self, mmap: bool = True):
+        """
+        Iterate over the committed partitions in time order.
+
+        Parameters:
+            mmap (bool): Memory-map the column files.
+
+        Returns:
+            Iterator[pd.DataFrame]: One frame per partition.
+        """
+
+        for name in self.manifest['partitions']:
+            yield load_columns(os.path.join(self.path, name), mmap=mmap)
+
+    def read(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Read the whole store (or some of its columns) as one DataFrame.
+
+        Parameters:
+            columns (list[str] | None): Columns to read, all by default.
+
+        Returns:
+            pd.DataFrame: Bars in time order.
+        """
+
+        columns = columns or self.manifest['columns']
+        parts = list(self.iter_partitions())
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        return pd.DataFrame({column: np.concatenate([part[column].to_numpy() for part in parts]) for column in columns})
+
+def ingest_csv(path: str, store: ColumnStore | str, schema: str | None = None, chunksize: int = 1_000_000) -> ColumnStore:
+    """
+    Stream a bar CSV file into a column store, chunk by chunk.
+
+    Each chunk is mapped to the canonical OHLCV layout, cleaned, sorted and deduplicated on
+    Datetime, also against the rows of previous chunks and of the store. Files may be in ascending
+    or descending time order (detected from the first chunk); rows that go against that order are
+    dropped. Peak memory stays around one chunk regardless of the file size.
+
+    Parameters:
+        path (str): Path to the CSV file.
+        store (ColumnStore | str): Store, or its directory, to append to.
+        schema (str | None): Name of the schema adapter, detected from the header by default.
+        chunksize (int): Rows per chunk.
+
+    Returns:
+        ColumnStore: The store with the new bars committed.
+    """
+
+    if isinstance(store, str):
+        store = ColumnStore(store)
+
+    header = pd.read_csv(path, nrows=0).columns
+    adapter = SCHEMAS[schema] if schema is not None else detect_schema(header)
+
+    store_last = store.last_time
+    descending = None
+    boundary = None
+    partitions = []
+    rows = 0
+    last_time = store_last
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        bars = adapter.convert(chunk).dropna()
+        if bars.empty:
+            continue
+
+        times = bars['Datetime']
+        if descending is None:
+            descending = times.iloc[0] > times.iloc[-1]
+
+        # Drop rows already covered by previous chunks or by the store
+        if boundary is not None:
+            bars = bars[times < boundary] if descending else bars[times > boundary]
+        if store_last is not None:
+            bars = bars[bars['Datetime'] > store_last]
+        if bars.empty:
+            continue
+
+        bars = bars.sort_values('Datetime', kind='stable').drop_duplicates(subset='Datetime')
+        boundary = bars['Datetime'].iloc[0] if descending else bars['Datetime'].iloc[-1]
+        if last_time is None or bars['Datetime'].iloc[-1] > last_time:
+            last_time = bars['Datetime'].iloc[-1]
+
+        partitions.append(store.write_partition(bars))
+        rows += len(bars)
+
+    # Partitions of a descending file were written newest first
+    if descending:
+        partitions.reverse()
+
+    store.commit(partitions, rows, last_time)
+
+    return store
+
+def load_store(path: str) -> pd.DataFrame:
+    """
+    Load the bars of a column store as a DataFrame ready for the backtest.
+
+    Parameters:
+        path (str): Directory of the store.
+
+    Returns:
+        pd.DataFrame: Canonical bars in time order.
+    """
+
+    return ColumnStore(path).read()
+
+def clear_store(path: str):
+    """
+    Delete a column store.
+
+    Parameters:
+        path (str): Directory of the store.
+
+    Returns:
+        None
+    """
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
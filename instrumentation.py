@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Recorder of the trial running in the current thread (None when instrumentation is off)
+_recorder = ContextVar('recorder', default=None)
+
+_DISABLED = nullcontext()
+
+class Recorder:
+    """
+    A class to collect the stage timings and counters of one trial.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.events = []
+        self.thread_id = threading.get_ident()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            total, calls = self.timings.get(name, (0, 0))
+            self.timings[name] = (total + duration, calls + 1)
+            self.events.append((name, start, duration))
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def peak(self, name: str, value: int):
+        self.counters[name] = max(self.counters.get(name, 0), value)
+
+    def summary(self) -> dict:
+        """
+        Seconds and number of calls of every stage.
+        """
+
+        return {name: {'seconds': total / 1e9, 'calls': calls} for name, (total, calls) in self.timings.items()}
+
+def current_recorder() -> Recorder | None:
+    """
+    Recorder of the running trial, None when instrumentation is off.
+    """
+
+    return _recorder.get()
+
+def stage(name: str):
+    """
+    Context manager timing a stage of the running trial; does nothing when instrumentation is off.
+
+    Parameters:
+        name (str): Stage name.
+
+    Returns:
+        ContextManager: Timer of the stage.
+    """
+
+    recorder = _recorder.get()
+    if recorder is None:
+        return _DISABLED
+    return recorder.stage(name)
+
+class ChromeTrace:
+    """
+    A class to gather the stage events of every trial of a study into a Chrome trace.
+
+    The dumped JSON opens in chrome://tracing or Perfetto, with one row per thread running trials.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def add(self, recorder: Recorder, trial_number: int):
+        pid = os.getpid()
+        events = [
+            {'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid,
+             'tid': recorder.thread_id, 'args': {'trial': trial_number}}
+            for name, start, duration in recorder.events
+        ]
+        with self._lock:
+            self.events.extend(events)
+
+    def dump(self, path: str):
+        """
+        Write the trace as Chrome trace event JSON.
+
+        Parameters:
+            path (str): Target file.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+@contextmanager
+def instrument_trial(trial, trace: ChromeTrace | None = None):
+    """
+    Record the stages and counters of a trial and store them as its user attributes.
+
+    The timings are stored under 'timings' ({stage: {'seconds', 'calls'}}) and the counters
+    under 'counters', also when the trial is pruned or fails.
+
+    Parameters:
+        trial (optuna.trial.Trial): Running trial.
+        trace (ChromeTrace | None): Trace collecting the events of the study.
+
+    Yields:
+        Recorder: Recorder of the trial.
+    """
+
+    recorder = Recorder()
+    token = _recorder.set(recorder)
+    try:
+        with recorder.stage('trial'):
+            yield recorder
+    finally:
+        _recorder.reset(token)
+        trial.set_user_attr('timings', recorder.summary())
+        trial.set_user_attr('counters', recorder.counters)
+        if trace is not None:
+            trace.add(recorder, trial.number)
+
+def instrumented(objective, trace: ChromeTrace | None = None):
+    """
+    Wrap an Optuna objective so each trial records its stage timings and counters.
+
+    Parameters:
+        objective (callable): Objective taking a trial.
+        trace (ChromeTrace | None): Trace collecting the events of the study.
+
+    Returns:
+        callable: Instrumented objective.
+    """
+
+    def wrapper(trial):
+        with instrument_trial(trial, trace):
+            return objective(trial)
+
+    return wrapper
@@ -1,20 +1,59 @@
 # Entrypoint
+import argparse
+import os
+import time
+
 import pandas as pd
 import optuna
 
-from utils import modify_data, split, returns_table
-from backtest import walk_forward, params_backtest
-from metrics import evaluate_metrics
+from utils import load_data, split, returns_table
+from backtest import walk_forward, params_backtest, market_view
+from metrics import evaluate_metrics, BARS_PER_YEAR
+from optimization import optimize_parallel, default_pruner, MAX_DRAWDOWN_STOP
+from instrumentation import ChromeTrace, instrumented
 from plots import plot_portfolio_value, plot_test_validation
-
-def main():
-    data = pd.read_csv('data/Binance_BTCUSDT_1h.csv').dropna()
-    data = modify_data(data)
+from timeframes import TIMEFRAMES, load_timeframe
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Optimize and evaluate the trading strategy.')
+    parser.add_argument('--data', default='data/Binance_BTCUSDT_1h.csv', help='Market data CSV file')
+    parser.add_argument('--timeframe', default=None, choices=list(TIMEFRAMES),
+                        help='Aggregate the data to this timeframe (cached) instead of using the raw bars')
+    parser.add_argument('--trials', type=int, default=100, help='Number of Optuna trials')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Optimization worker processes (1 runs threaded trials in this process)')
+    parser.add_argument('--storage', default='optuna_journal.log', help='Journal file shared by the worker processes')
+    parser.add_argument('--study-name', default=None, help='Study name in the journal (resumed if it exists)')
+    parser.add_argument('--trace', default=None,
+                        help='Record per-trial stage timings and write a Chrome trace of the study to this file (threaded trials only)')
+    parser.add_argument('--plots', default=None, help='Save the plots as PNG files in this directory instead of showing them')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    data = load_data(args.data) if args.timeframe is None else load_timeframe(args.data, args.timeframe)
+    annualization = data.attrs.get('bars_per_year', BARS_PER_YEAR)
 
     train, test, validation = split(data)
 
-    study = optuna.create_study(direction='maximize')
-    study.optimize(lambda trial: walk_forward(train, trial, n_splits=5), n_trials=100, n_jobs=-1)
+    if args.workers > 1:
+        study_name = args.study_name or f'study-{int(time.time())}'
+        study = optimize_parallel(args.data, study_name, args.storage, n_trials=args.trials, n_workers=args.workers,
+                                   timeframe=args.timeframe)
+    else:
+        # Arrays of the training data shared by every trial
+        train_view = market_view(train)
+        objective = lambda trial: walk_forward(train, trial, n_splits=5, max_drawdown_stop=MAX_DRAWDOWN_STOP, view=train_view)
+        trace = ChromeTrace() if args.trace else None
+        if trace is not None:
+            objective = instrumented(objective, trace)
+
+        study = optuna.create_study(direction='maximize', pruner=default_pruner())
+        study.optimize(objective, n_trials=args.trials, n_jobs=-1)
+
+        if trace is not None:
+            trace.dump(args.trace)
 
     print()
 
@@ -41,7 +80,7 @@ def main():
     print(f"Win rate: {win_rate_train:.2%}")
 
     print("Performance metrics:")
-    print(evaluate_metrics(pd.Series(portfolio_value_train)))
+    print(evaluate_metrics(pd.Series(portfolio_value_train), bars_per_year=annualization))
 
     print("Returns table:")
     print(returns_table(portfolio_value_train, train))
@@ -61,7 +100,7 @@ def main():
     print(f"Win rate: {win_rate_test:.2%}")
 
     print("Performance metrics:")
-    print(evaluate_metrics(pd.Series(portfolio_value_test)))
+    print(evaluate_metrics(pd.Series(portfolio_value_test), bars_per_year=annualization))
 
     print("Returns table:")
     print(returns_table(portfolio_value_test, test))
@@ -81,7 +120,7 @@ def main():
     print(f"Win rate: {win_rate_validation:.2%}")
 
     print("Performance metrics:")
-    print(evaluate_metrics(pd.Series(portfolio_value_validation)))
+    print(evaluate_metrics(pd.Series(portfolio_value_validation), bars_per_year=annualization))
 
     print("Returns table:")
     print(returns_table(portfolio_value_validation, validation))
@@ -101,16 +140,20 @@ def main():
     print("Portfolio value: ", portfolio_value_validation[-1])
 
     print("Performance metrics:")
-    print(evaluate_metrics(pd.Series(total_portfolio)))
+    print(evaluate_metrics(pd.Series(total_portfolio), bars_per_year=annualization))
 
     print("Returns table:")
     print(returns_table(total_portfolio, test_validation))
 
     # Plots
 
-    plot_portfolio_value(portfolio_value_train)
+    if args.plots is not None:
+        os.makedirs(args.plots, exist_ok=True)
+    plot_dir = lambda name: os.path.join(args.plots, name) if args.plots is not None else None
+
+    plot_portfolio_value(portfolio_value_train, path=plot_dir('train.png'))
     
-    plot_test_validation(portfolio_value_test, portfolio_value_validation, test, validation)
+    plot_test_validation(portfolio_value_test, portfolio_value_validation, test, validation, path=plot_dir('test_validation.png'))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
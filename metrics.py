@@ -1,51 +1,89 @@
+import warnings
+
 import numpy as np
 import pandas as pd
 
-def sharpe_ratio(portfolio_values: pd.Series) -> float:
+# Hourly bars
+BARS_PER_YEAR = 365 * 24
+
+def performance_metrics(portfolio_values, bars_per_year: float = BARS_PER_YEAR) -> dict:
+    """
+    Calculate every performance metric of one or many portfolios in a single pass.
+
+    The returns and the running peak are computed once and shared by all the metrics, which
+    match the pandas definitions (pct_change, std with ddof=1, cummax drawdown).
+
+    Parameters:
+        portfolio_values (array-like): Portfolio values over time, shape (n_bars,) or (n_portfolios, n_bars).
+        bars_per_year (float): Number of bars in a year, used to annualize the ratios.
+
+    Returns:
+        dict: Sharpe ratio, Sortino ratio, Max drawdown and Calmar ratio, as floats for a single
+        portfolio or as arrays of shape (n_portfolios,).
+    """
+
+    values = np.asarray(portfolio_values, dtype=float)
+    single = values.ndim == 1
+    values = np.atleast_2d(values)
+
+    # Fewer than two values give NaN statistics (and ratios of 0), as with pandas
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        # Per-bar returns
+        returns = values[:, 1:] / values[:, :-1] - 1
+        mean = returns.mean(axis=1)
+        std = returns.std(axis=1, ddof=1)
+        downside = np.minimum(returns, 0).std(axis=1, ddof=1)
+
+        # Max drawdown
+        rolling_max = np.maximum.accumulate(values, axis=1)
+        mdd = np.abs(((values - rolling_max) / rolling_max).min(axis=1))
+
+        # Annualized
+        annual_rets = mean * bars_per_year
+        annual_std = std * np.sqrt(bars_per_year)
+        annual_downside = downside * np.sqrt(bars_per_year)
+
+        metrics = {
+            'Sharpe ratio': np.where(annual_std > 0, annual_rets / annual_std, 0.),
+            'Sortino ratio': np.where(annual_downside > 0, annual_rets / annual_downside, 0.),
+            'Max drawdown': mdd,
+            'Calmar ratio': calmar_from_stats(mean, mdd, bars_per_year),
+        }
+
+    if single:
+        return {name: float(value[0]) for name, value in metrics.items()}
+
+    return metrics
+
+def sharpe_ratio(portfolio_values: pd.Series, bars_per_year: float = BARS_PER_YEAR) -> float:
     """
     Calculate the Sharpe ratio of a portfolio.
     
     Parameters:
         portfolio_values (pd.Series): Series of portfolio values over time.
+        bars_per_year (float): Number of bars in a year.
     
     Returns:
         float: Sharpe ratio of the portfolio.
     """
     
-    # Hourly
-    returns = portfolio_values.pct_change().dropna()
-    mean = returns.mean()
-    std = returns.std()
+    return performance_metrics(portfolio_values, bars_per_year)['Sharpe ratio']
 
-    # Annualized
-    intervals = 365 * 24 * 60 / 60  # Daily intervals in 1-hour data
-    annual_rets = mean * intervals
-    annual_std = std * np.sqrt(intervals)
-
-    return annual_rets / annual_std if annual_std > 0 else 0
-
-def sortino_ratio(portfolio_values: pd.Series) -> float:
+def sortino_ratio(portfolio_values: pd.Series, bars_per_year: float = BARS_PER_YEAR) -> float:
     """
     Calculate the Sortino ratio of a portfolio.
     
     Parameters:
         portfolio_values (pd.Series): Series of portfolio values over time.
+        bars_per_year (float): Number of bars in a year.
 
     Returns:
         float: Sortino ratio of the portfolio.
     """
 
-    # Hourly
-    returns = portfolio_values.pct_change().dropna()
-    mean = returns.mean()
-    downside = np.minimum(returns, 0).std()
-
-    # Annualized
-    intervals = 365 * 24 * 60 / 60  # Daily intervals in 1-hour data
-    annual_rets = mean * intervals
-    annual_downside = downside * np.sqrt(intervals)
-
-    return annual_rets / annual_downside if annual_downside > 0 else 0
+    return performance_metrics(portfolio_values, bars_per_year)['Sortino ratio']
 
 def max_drawdown(portfolio_values: pd.Series) -> float:
     """
@@ -58,51 +96,101 @@ def max_drawdown(portfolio_values: pd.Series) -> float:
         float: Maximum drawdown of the portfolio.
     """
     
-    rolling_max = portfolio_values.cummax()
-    drawdowns = (portfolio_values - rolling_max) / rolling_max
-    max_dd = drawdowns.min()
-
-    return abs(max_dd)
+    return performance_metrics(portfolio_values)['Max drawdown']
 
-def calmar_ratio(portfolio_values: pd.Series) -> float:
+def calmar_ratio(portfolio_values: pd.Series, bars_per_year: float = BARS_PER_YEAR) -> float:
     """
     Calculate the Calmar ratio of a portfolio.
     
     Parameters:
         portfolio_values (pd.Series): Series of portfolio values over time.
+        bars_per_year (float): Number of bars in a year.
 
     Returns:
         float: Calmar ratio of the portfolio.
     """
     
-    # Hourly
-    returns = portfolio_values.pct_change().dropna()
-    mean = returns.mean()
+    return performance_metrics(portfolio_values, bars_per_year)['Calmar ratio']
+
+def calmar_from_stats(mean_return, mdd, bars_per_year: float = BARS_PER_YEAR):
+    """
+    Calculate the Calmar ratio from already aggregated statistics.
+    
+    Parameters:
+        mean_return (float | np.ndarray): Mean per-bar return of the portfolio(s).
+        mdd (float | np.ndarray): Maximum drawdown of the portfolio(s) (positive fraction).
+        bars_per_year (float): Number of bars in a year.
 
+    Returns:
+        float | np.ndarray: Calmar ratio of the portfolio(s).
+    """
+    
     # Annualized
-    intervals = 365 * 24 * 60 / 60  # Daily intervals in 1-hour data
-    annual_rets = mean * intervals
+    annual_rets = np.multiply(mean_return, bars_per_year)
 
-    # Max Drawdown
-    mdd = max_drawdown(portfolio_values)
+    if np.ndim(mdd) == 0:
+        return annual_rets / mdd if mdd > 0 else 0
 
-    return annual_rets / mdd if mdd > 0 else 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(mdd > 0, annual_rets / mdd, 0.)
 
-def evaluate_metrics(portfolio_values: pd.Series) -> pd.DataFrame:
+def metrics_from_stats(n_returns: int, returns_sum, returns_sq_sum, downside_sum, downside_sq_sum, mdd,
+                       bars_per_year: float = BARS_PER_YEAR) -> dict:
+    """
+    Calculate the performance metrics from running sums of the per-bar returns.
+
+    Gives the values of performance_metrics() (up to floating point rounding) for simulations
+    that accumulate their statistics bar by bar instead of keeping the portfolio values.
+
+    Parameters:
+        n_returns (int): Number of per-bar returns.
+        returns_sum (np.ndarray): Sum of the returns of each portfolio.
+        returns_sq_sum (np.ndarray): Sum of the squared returns.
+        downside_sum (np.ndarray): Sum of the returns clipped at 0 from above (min(return, 0)).
+        downside_sq_sum (np.ndarray): Sum of the squared clipped returns.
+        mdd (np.ndarray): Maximum drawdown of each portfolio (positive fraction).
+        bars_per_year (float): Number of bars in a year.
+
+    Returns:
+        dict: Sharpe ratio, Sortino ratio, Max drawdown and Calmar ratio as arrays.
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = float(n_returns)
+        mean = np.asarray(returns_sum) / n
+
+        # Sample standard deviations (ddof=1), NaN below two returns as with pandas
+        def std(total, sq_total):
+            if n_returns < 2:
+                return np.full(np.shape(total), np.nan)
+            return np.sqrt(np.maximum(np.asarray(sq_total) - np.asarray(total) ** 2 / n, 0) / (n - 1))
+
+        annual_rets = mean * bars_per_year
+        annual_std = std(returns_sum, returns_sq_sum) * np.sqrt(bars_per_year)
+        annual_downside = std(downside_sum, downside_sq_sum) * np.sqrt(bars_per_year)
+
+        return {
+            'Sharpe ratio': np.where(annual_std > 0, annual_rets / annual_std, 0.),
+            'Sortino ratio': np.where(annual_downside > 0, annual_rets / annual_downside, 0.),
+            'Max drawdown': np.asarray(mdd, dtype=float),
+            'Calmar ratio': calmar_from_stats(mean, np.asarray(mdd, dtype=float), bars_per_year),
+        }
+
+def evaluate_metrics(portfolio_values, bars_per_year: float = BARS_PER_YEAR) -> pd.DataFrame:
     """
     Evaluate key performance metrics of a portfolio.
     
     Parameters:
-        portfolio_values (pd.Series): Series of portfolio values over time.
+        portfolio_values (pd.Series | np.ndarray): Portfolio values over time, or a 2-D array with one portfolio per row.
+        bars_per_year (float): Number of bars in a year.
 
     Returns:
-        pd.DataFrame: DataFrame containing Sharpe ratio, Sortino ratio, Max drawdown, and Calmar ratio.
+        pd.DataFrame: DataFrame containing Sharpe ratio, Sortino ratio, Max drawdown, and Calmar ratio,
+        one row per portfolio.
     """
     
-    metrics = {
-        'Sharpe ratio': sharpe_ratio(portfolio_values),
-        'Sortino ratio': sortino_ratio(portfolio_values),
-        'Max drawdown': max_drawdown(portfolio_values),
-        'Calmar ratio': calmar_ratio(portfolio_values)
-    }
-    return pd.DataFrame([metrics], index=['Value'])
\ No newline at end of file
+    metrics = performance_metrics(portfolio_values, bars_per_year)
+    if np.ndim(portfolio_values) == 1:
+        return pd.DataFrame([metrics], index=['Value'])
+
+    return pd.DataFrame(metrics)
@@ -1,14 +1,305 @@
-from dataclasses import dataclass
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+class TradeLedger:
+    """
+    A class to record closed trades in a preallocated NumPy structured array.
+
+    One row per trade with entry/exit time and price, size, side (1 long, -1 short), PnL and
+    exit reason, grown by doubling so recording a trade never allocates a Python object.
+    """
+
+    dtype = np.dtype([
+        ('entry_time', 'datetime64[ns]'),
+        ('exit_time', 'datetime64[ns]'),
+        ('entry_price', 'f8'),
+        ('exit_price', 'f8'),
+        ('n_shares', 'f8'),
+        ('side', 'i1'),
+        ('pnl', 'f8'),
+        ('exit_reason', 'i1'),
+    ])
+
+    SIDES = {"LONG": 1, "SHORT": -1}
+    EXIT_REASONS = ("TP", "SL", "END")
+
+    def __init__(self, capacity: int = 1024):
+        self._records = np.zeros(capacity, dtype=self.dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def records(self) -> np.ndarray:
+        """
+        Structured array view of the recorded trades.
+        """
+
+        return self._records[:self._size]
+
+    def append(self, entry_time, exit_time, entry_price: float, exit_price: float, n_shares: float, type: str, pnl: float, reason: str):
+        """
+        Record a closed trade.
+
+        Parameters:
+            entry_time: Entry time.
+            exit_time: Exit time.
+            entry_price (float): Entry price.
+            exit_price (float): Exit price.
+            n_shares (float): Number of shares.
+            type (str): "LONG" or "SHORT".
+            pnl (float): PnL of the trade after commissions.
+            reason (str): Exit reason, "TP", "SL" or "END".
+
+        Returns:
+            None
+        """
+
+        if self._size == len(self._records):
+            self._records = np.concatenate([self._records, np.zeros(max(len(self._records), 1), dtype=self.dtype)])
+
+        self._records[self._size] = (entry_time, exit_time, entry_price, exit_price, n_shares,
+                                     self.SIDES[type], pnl, self.EXIT_REASONS.index(reason))
+        self._size += 1
+
+    def win_rate(self) -> float:
+        """
+        Fraction of trades with a non-negative PnL.
+        """
+
+        return float(np.mean(self.records['pnl'] >= 0)) if self._size > 0 else 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Convert the ledger to a DataFrame with readable side and exit reason columns.
+        """
+
+        frame = pd.DataFrame(self.records)
+        frame['side'] = frame['side'].map({1: "LONG", -1: "SHORT"})
+        frame['exit_reason'] = frame['exit_reason'].map(dict(enumerate(self.EXIT_REASONS)))
+
+        return frame
+
+    def save_npz(self, path: str):
+        """
+        Save the ledger as a compressed .npz file.
+        """
+
+        np.savez_compressed(path, trades=self.records)
+
+    @classmethod
+    def load_npz(cls, path: str) -> 'TradeLedger':
+        """
+        Load a ledger saved with save_npz.
+        """
+
+        records = np.load(path)['trades']
+        ledger = cls(capacity=max(len(records), 1))
+        ledger._records[:len(records)] = records
+        ledger._size = len(records)
+
+        return ledger
+
+    def to_parquet(self, path: str):
+        """
+        Save the ledger as a Parquet file (requires pyarrow or fastparquet).
+        """
+
+        self.to_frame().to_parquet(path, index=False)
+
+@dataclass
+class BacktestResult:
+    """
+    A class to hold the outputs of a backtest simulation.
+
+    Only the outputs requested from the simulation are filled in, the rest keep their defaults.
+    stopped_at is the bar index where the drawdown kill switch ended the simulation, if it did.
+    """
+
+    cash: float
+    calmar: float | None = None
+    portfolio_value: list[float] | None = None
+    positive_trades: int = 0
+    negative_trades: int = 0
+    trades: TradeLedger | None = field(default=None, repr=False)
+    stopped_at: int | None = None
+
+    @property
+    def win_rate(self) -> float:
+        """
+        Fraction of closed trades with a non-negative PnL.
+        """
+
+        total = self.positive_trades + self.negative_trades
+        return self.positive_trades / total if total > 0 else 0
 
 @dataclass
-class Operation:
+class PortfolioResult(BacktestResult):
     """
-    A class to represent a trading operation.
+    A class to hold the outputs of a multi-asset portfolio simulation.
+
+    portfolio_value has one entry per time of the union index, listed in times.
     """
-    
-    time: str
-    price: float
-    stop_loss: float
-    take_profit: float
-    n_shares: int
-    type: str
\ No newline at end of file
+
+    symbols: list[str] = field(default_factory=list)
+    times: np.ndarray | None = field(default=None, repr=False)
+
+@dataclass
+class MarketView:
+    """
+    A class to hold read-only views of the arrays the simulation reads from market data.
+
+    complete flags the rows without missing values (the rows dropna() keeps). Slicing returns
+    views, so walk-forward folds share the arrays of the full dataset.
+    """
+
+    times: np.ndarray
+    closes: np.ndarray
+    complete: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    def __getitem__(self, key: slice) -> 'MarketView':
+        return MarketView(self.times[key], self.closes[key], self.complete[key])
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.closes.nbytes + self.complete.nbytes
+
+class PositionBook:
+    """
+    A class to hold the open positions of one side in parallel lists sorted by entry price.
+
+    With fixed take profit and stop loss percentages both levels grow with the entry price, so the
+    positions triggered on a bar are a prefix and a suffix of the book, found by binary search.
+    Running totals of shares and entry value give the mark-to-market value in O(1).
+    """
+
+    def __init__(self, type: str, take_profit: float, stop_loss: float):
+        self.type = type
+        self.take_profit_pct = take_profit
+        self.stop_loss_pct = stop_loss
+
+        self.times = []
+        self.prices = []
+        self.n_shares = []
+        self.take_profits = []
+        self.stop_losses = []
+
+        self.total_shares = 0.0
+        self.total_cost = 0.0
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def open(self, time, price: float, n_shares: float):
+        """
+        Add a position, keeping the book sorted by entry price.
+
+        Parameters:
+            time: Entry time.
+            price (float): Entry price.
+            n_shares (float): Number of shares.
+
+        Returns:
+            None
+        """
+
+        if self.type == "LONG":
+            take_profit = price * (1 + self.take_profit_pct)
+            stop_loss = price * (1 - self.stop_loss_pct)
+        else:
+            take_profit = price * (1 - self.take_profit_pct)
+            stop_loss = price * (1 + self.stop_loss_pct)
+
+        i = bisect_right(self.prices, price)
+        self.times.insert(i, time)
+        self.prices.insert(i, price)
+        self.n_shares.insert(i, n_shares)
+        self.take_profits.insert(i, take_profit)
+        self.stop_losses.insert(i, stop_loss)
+
+        self.total_shares += n_shares
+        self.total_cost += price * n_shares
+
+    def close_triggered(self, price: float) -> list[tuple]:
+        """
+        Remove and return the positions whose take profit or stop loss is hit at the given price.
+
+        Parameters:
+            price (float): Current price of the asset.
+
+        Returns:
+            list[tuple]: (time, entry price, n_shares, reason) of each closed position, reason being "TP" or "SL".
+        """
+
+        n = len(self.prices)
+        if n == 0:
+            return []
+
+        if self.type == "LONG":
+            # price > take_profit for a prefix, price < stop_loss for a suffix
+            lo = bisect_left(self.take_profits, price)
+            hi = bisect_right(self.stop_losses, price)
+            reasons = ("TP", "SL")
+        else:
+            # price > stop_loss for a prefix, price < take_profit for a suffix
+            lo = bisect_left(self.stop_losses, price)
+            hi = bisect_right(self.take_profits, price)
+            reasons = ("SL", "TP")
+
+        if lo == 0 and hi == n:
+            return []
+
+        closed = [(*position, reasons[0]) for position in zip(self.times[:lo], self.prices[:lo], self.n_shares[:lo])]
+        closed += [(*position, reasons[1]) for position in zip(self.times[hi:], self.prices[hi:], self.n_shares[hi:])]
+
+        for column in (self.times, self.prices, self.n_shares, self.take_profits, self.stop_losses):
+            del column[hi:]
+            del column[:lo]
+
+        if self.prices:
+            for _, entry_price, n_shares, _ in closed:
+                self.total_shares -= n_shares
+                self.total_cost -= entry_price * n_shares
+        else:
+            self.total_shares = 0.0
+            self.total_cost = 0.0
+
+        return closed
+
+    def close_all(self) -> list[tuple]:
+        """
+        Remove and return every open position.
+
+        Returns:
+            list[tuple]: (time, entry price, n_shares) of each closed position.
+        """
+
+        closed = list(zip(self.times, self.prices, self.n_shares))
+        for column in (self.times, self.prices, self.n_shares, self.take_profits, self.stop_losses):
+            column.clear()
+        self.total_shares = 0.0
+        self.total_cost = 0.0
+
+        return closed
+
+    def value(self, price: float) -> float:
+        """
+        Value of the open positions at the given price (shorts at entry value plus unrealized PnL).
+
+        Parameters:
+            price (float): Current price of the asset.
+
+        Returns:
+            float: Value of the open positions.
+        """
+
+        if self.type == "LONG":
+            return price * self.total_shares
+        return 2 * self.total_cost - price * self.total_shares
@@ -0,0 +1,223 @@
+import numpy as np
+
+NAN = float('nan')
+
+class OnlineEMA:
+    """
+    A class to update an exponential moving average one value at a time.
+
+    Reproduces pd.Series.ewm(..., adjust=False).mean() exactly (the recursion used by ta's EMA,
+    MACD and RSI), including the min_periods warm-up and leading NaN values.
+    """
+
+    def __init__(self, span: float | None = None, alpha: float | None = None, min_periods: int = 0):
+        # pandas converts span and alpha to a center of mass before computing alpha
+        com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+        self.alpha = 1. / (1. + com)
+        self.min_periods = max(int(min_periods), 1)
+
+        self.value = NAN
+        self.old_wt = 1.
+        self.nobs = 0
+        self.started = False
+
+    def update(self, x: float) -> float:
+        """
+        Add a value and return the moving average (NaN during the warm-up).
+
+        Parameters:
+            x (float): New value.
+
+        Returns:
+            float: Current moving average.
+        """
+
+        is_observation = x == x
+        self.nobs += is_observation
+
+        if not self.started:
+            self.started = True
+            self.value = x
+        elif self.value == self.value:
+            self.old_wt *= 1. - self.alpha
+            if is_observation:
+                if self.value != x:
+                    self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.
+        elif is_observation:
+            self.value = x
+
+        return self.value if self.nobs >= self.min_periods else NAN
+
+    def state(self) -> dict:
+        return {'alpha': self.alpha, 'min_periods': self.min_periods, 'value': self.value,
+                'old_wt': self.old_wt, 'nobs': self.nobs, 'started': self.started}
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'OnlineEMA':
+        ema = cls(alpha=state['alpha'])
+        ema.__dict__.update(state)
+        return ema
+
+class OnlineRSI:
+    """
+    A class to update the RSI one close price at a time, matching ta.momentum.RSIIndicator.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.previous = NAN
+        self.up = OnlineEMA(alpha=1 / window, min_periods=window)
+        self.down = OnlineEMA(alpha=1 / window, min_periods=window)
+
+    def update(self, close: float) -> float:
+        """
+        Add a close price and return the RSI (NaN during the warm-up).
+        """
+
+        diff = close - self.previous
+        self.previous = close
+
+        up = diff if diff > 0 else 0.0
+        down = -(diff if diff < 0 else 0.0)
+        emaup = self.up.update(up)
+        emadn = self.down.update(down)
+
+        if emadn == 0:
+            return 100.
+        return 100 - (100 / (1 + emaup / emadn)) if emadn == emadn else NAN
+
+    def state(self) -> dict:
+        return {'window': self.window, 'previous': self.previous, 'up': self.up.state(), 'down': self.down.state()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'OnlineRSI':
+        rsi = cls(state['window'])
+        rsi.previous = state['previous']
+        rsi.up = OnlineEMA.from_state(state['up'])
+        rsi.down = OnlineEMA.from_state(state['down'])
+        return rsi
+
+class OnlineMACD:
+    """
+    A class to update the MACD and signal lines one close price at a time, matching ta.trend.MACD.
+    """
+
+    def __init__(self, short_window: int, long_window: int, signal_window: int):
+        self.fast = OnlineEMA(span=short_window, min_periods=short_window)
+        self.slow = OnlineEMA(span=long_window, min_periods=long_window)
+        self.signal = OnlineEMA(span=signal_window, min_periods=signal_window)
+
+    def update(self, close: float) -> tuple[float, float]:
+        """
+        Add a close price and return (macd_line, signal_line).
+        """
+
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        return macd_line, self.signal.update(macd_line)
+
+    def state(self) -> dict:
+        return {'fast': self.fast.state(), 'slow': self.slow.state(), 'signal': self.signal.state()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'OnlineMACD':
+        macd = cls.__new__(cls)
+        macd.fast = OnlineEMA.from_state(state['fast'])
+        macd.slow = OnlineEMA.from_state(state['slow'])
+        macd.signal = OnlineEMA.from_state(state['signal'])
+        return macd
+
+class OnlineSignals:
+    """
+    A class to generate the strategy signals bar by bar in constant time and memory.
+
+    Produces the same values as rsi_signals, ema_signals (crossover), macd_signals and combined_signals
+    over the full history. state() returns a JSON-serializable dict to resume from later.
+    """
+
+    def __init__(self, params: dict):
+        self.params = {key: params[key] for key in ('rsi_window', 'rsi_lower', 'rsi_upper', 'ema_short_window',
+                                                    'ema_long_window', 'macd_short_window', 'macd_long_window',
+                                                    'macd_signal_window')}
+        self.rsi = OnlineRSI(params['rsi_window'])
+        self.short_ema = OnlineEMA(span=params['ema_short_window'], min_periods=params['ema_short_window'])
+        self.long_ema = OnlineEMA(span=params['ema_long_window'], min_periods=params['ema_long_window'])
+        self.macd = OnlineMACD(params['macd_short_window'], params['macd_long_window'], params['macd_signal_window'])
+
+        # Previous EMA comparison for the crossover
+        self.previous_short = NAN
+        self.previous_long = NAN
+
+    def update(self, close: float) -> tuple[bool, bool]:
+        """
+        Add a close price and return the combined (buy_signal, sell_signal) of the bar.
+        """
+
+        # RSI (fixed thresholds)
+        rsi = self.rsi.update(close)
+        rsi_buy = rsi < self.params['rsi_lower']
+        rsi_sell = rsi > self.params['rsi_upper']
+
+        # EMA (crossover)
+        short_ema = self.short_ema.update(close)
+        long_ema = self.long_ema.update(close)
+        ema_buy = short_ema > long_ema and self.previous_short <= self.previous_long
+        ema_sell = short_ema < long_ema and self.previous_short >= self.previous_long
+        self.previous_short = short_ema
+        self.previous_long = long_ema
+
+        # MACD (fixed)
+        macd_line, signal_line = self.macd.update(close)
+        macd_buy = macd_line > signal_line
+        macd_sell = macd_line < signal_line
+
+        # Indicators agreement
+        buy_signal = rsi_buy + ema_buy + macd_buy >= 2
+        sell_signal = rsi_sell + ema_sell + macd_sell >= 2
+
+        return buy_signal, sell_signal
+
+    def state(self) -> dict:
+        return {
+            'params': self.params,
+            'rsi': self.rsi.state(),
+            'short_ema': self.short_ema.state(),
+            'long_ema': self.long_ema.state(),
+            'macd': self.macd.state(),
+            'previous_short': self.previous_short,
+            'previous_long': self.previous_long,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'OnlineSignals':
+        signals = cls(state['params'])
+        signals.rsi = OnlineRSI.from_state(state['rsi'])
+        signals.short_ema = OnlineEMA.from_state(state['short_ema'])
+        signals.long_ema = OnlineEMA.from_state(state['long_ema'])
+        signals.macd = OnlineMACD.from_state(state['macd'])
+        signals.previous_short = state['previous_short']
+        signals.previous_long = state['previous_long']
+        return signals
+
+def replay_signals(closes, params: dict, signals: OnlineSignals | None = None):
+    """
+    Feed a sequence of close prices through the online signal engine.
+
+    Parameters:
+        closes (array-like): Close prices in time order.
+        params (dict): Dictionary of hyperparameters.
+        signals (OnlineSignals | None): Engine to continue from, a new one by default.
+
+    Returns:
+        tuple: (buy_signal, sell_signal) as np.ndarray of boolean values, and the engine.
+    """
+
+    signals = signals or OnlineSignals(params)
+    closes = np.asarray(closes, dtype=float).tolist()
+    buys = np.empty(len(closes), dtype=bool)
+    sells = np.empty(len(closes), dtype=bool)
+
+    for i, close in enumerate(closes):
+        buys[i], sells[i] = signals.update(close)
+
+    return buys, sells, signals
@@ -0,0 +1,129 @@
+import multiprocessing as mp
+
+import optuna
+from optuna.storages import JournalStorage
+from optuna.storages.journal import JournalFileBackend
+from optuna.study import MaxTrialsCallback
+
+from utils import load_data, split
+from timeframes import load_timeframe
+from backtest import walk_forward, suggest_params, population_walk_forward, market_view
+
+# Drawdown at which a fold's simulation is abandoned during optimization (the trial scores -inf)
+MAX_DRAWDOWN_STOP = 0.5
+
+def default_pruner() -> optuna.pruners.BasePruner:
+    """
+    Pruner used by the optimization studies.
+
+    Trials are compared fold by fold once a few trials have completed, and stopped when their
+    running mean Calmar ratio falls below the median of earlier trials at the same fold.
+
+    Returns:
+        optuna.pruners.BasePruner: Median pruner.
+    """
+
+    return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+
+def journal_storage(path: str) -> JournalStorage:
+    """
+    Create an Optuna storage backed by a local journal file that several processes can share.
+
+    Parameters:
+        path (str): Path to the journal file.
+
+    Returns:
+        JournalStorage: Optuna storage.
+    """
+
+    return JournalStorage(JournalFileBackend(path))
+
+def _optimize_worker(study_name: str, storage_path: str, data_path: str, n_trials: int, n_splits: int,
+                     timeframe: str | None = None):
+    # Load the data once per worker process
+    data = load_data(data_path) if timeframe is None else load_timeframe(data_path, timeframe)
+    train, _, _ = split(data)
+    train_view = market_view(train)
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(study_name=study_name, storage=journal_storage(storage_path), pruner=default_pruner())
+    study.optimize(
+        lambda trial: walk_forward(train, trial, n_splits=n_splits, max_drawdown_stop=MAX_DRAWDOWN_STOP, view=train_view),
+        callbacks=[MaxTrialsCallback(n_trials, states=None)],
+    )
+
+def optimize_parallel(data_path: str, study_name: str, storage_path: str, n_trials: int = 100,
+                      n_workers: int = 1, n_splits: int = 5, timeframe: str | None = None) -> optuna.Study:
+    """
+    Optimize the strategy with several worker processes sharing one study.
+
+    Each worker loads the training data once and pulls trials from the shared journal storage
+    until the study holds n_trials trials. Processes sidestep the GIL that limits threaded
+    study.optimize(n_jobs=-1) to roughly one core.
+
+    Parameters:
+        data_path (str): Path to the market data CSV file.
+        study_name (str): Name of the study (resumed if it already exists in the storage).
+        storage_path (str): Path to the journal file shared by the workers.
+        n_trials (int): Total number of trials of the study.
+        n_workers (int): Number of worker processes.
+        n_splits (int): Number of splits for the walk-forward evaluation.
+        timeframe (str | None): Optimize on this timeframe of the data (see timeframes.load_timeframe)
+            instead of the raw bars.
+
+    Returns:
+        optuna.Study: The optimized study.
+    """
+
+    storage = journal_storage(storage_path)
+    study = optuna.create_study(study_name=study_name, storage=storage, direction='maximize', load_if_exists=True,
+                                pruner=default_pruner())
+
+    # Non-daemon processes so each worker may start its own fold pool
+    ctx = mp.get_context('spawn')
+    workers = [
+        ctx.Process(target=_optimize_worker, args=(study_name, storage_path, data_path, n_trials, n_splits, timeframe))
+        for _ in range(n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    failed = [worker.exitcode for worker in workers if worker.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"{len(failed)} optimization worker(s) failed with exit codes {failed}")
+
+    return optuna.load_study(study_name=study_name, storage=storage)
+
+def optimize_batched(study: optuna.Study, data, n_trials: int = 100, batch_size: int = 32,
+                     n_splits: int = 5, use_bank: bool = True) -> optuna.Study:
+    """
+    Optimize the strategy by asking the sampler for batches of trials and scoring each batch in one vectorized pass.
+
+    Best suited to samplers that propose many candidates at once (CMA-ES, random, grid).
+
+    Parameters:
+        study (optuna.Study): Study to optimize.
+        data (pd.DataFrame): Training market data.
+        n_trials (int): Number of trials to run.
+        batch_size (int): Number of trials evaluated together.
+        n_splits (int): Number of splits for the walk-forward evaluation.
+        use_bank (bool): Use a cached indicator bank per fold.
+
+    Returns:
+        optuna.Study: The optimized study.
+    """
+
+    remaining = n_trials
+    while remaining > 0:
+        trials = [study.ask() for _ in range(min(batch_size, remaining))]
+        params_list = [suggest_params(trial) for trial in trials]
+
+        values = population_walk_forward(data, params_list, n_splits=n_splits, use_bank=use_bank)
+        for trial, value in zip(trials, values):
+            study.tell(trial, float(value))
+
+        remaining -= len(trials)
+
+    return study
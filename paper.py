@@ -0,0 +1,314 @@
+import asyncio
+import inspect
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from backtest import COM
+from ingest import read_bars
+from models import PositionBook
+from online import OnlineSignals
+
+@dataclass(slots=True)
+class Bar:
+    """
+    A class to represent one bar received from a feed.
+
+    complete is False for bars with missing values, which update the indicators but are not
+    traded (the rows simulate_signals skips).
+    """
+
+    symbol: str
+    time: str
+    close: float
+    complete: bool = True
+
+class ReplayFeed:
+    """
+    A class to replay historical bars as a live feed.
+
+    data is a DataFrame or a bar file read with ingest.read_bars. speed is the replay speed relative
+    to real time (60 plays one minute of bars per second); None replays as fast as possible, still
+    yielding to the event loop after every bar so concurrent feeds interleave. Every row is replayed,
+    rows with a missing value in any column as incomplete bars, so the trader sees the bars the
+    backtest sees.
+    """
+
+    def __init__(self, data: pd.DataFrame | str, symbol: str, speed: float | None = None):
+        if isinstance(data, str):
+            data = read_bars(data)
+        self.data = data
+        self.symbol = symbol
+        self.speed = speed
+
+    async def __aiter__(self):
+        times = pd.to_datetime(self.data['Datetime']).to_numpy()
+        closes = self.data['Close'].to_numpy(dtype=float)
+        complete = self.data.notna().all(axis=1).to_numpy().tolist()
+
+        for i in range(len(closes)):
+            if self.speed is None:
+                await asyncio.sleep(0)
+            elif i > 0:
+                await asyncio.sleep((times[i] - times[i - 1]) / np.timedelta64(1, 's') / self.speed)
+            yield Bar(self.symbol, str(times[i]), float(closes[i]), complete[i])
+
+class SocketFeed:
+    """
+    A class to read bars from a local socket, one JSON object per line ({"symbol", "time", "close"},
+    optionally "complete"). Bars without a close price are incomplete.
+
+    Stands in for an exchange connection; one connection may carry several symbols. The feed ends
+    when the server closes the connection.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9000):
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                close = float(message['close']) if message['close'] is not None else float('nan')
+                complete = bool(message.get('complete', True)) and close == close
+                yield Bar(message['symbol'], message['time'], close, complete)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+class LatencyStats:
+    """
+    A class to collect the per-bar decision latency (from bar received to events emitted).
+    """
+
+    def __init__(self):
+        self.samples = []
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        """
+        Count, mean, median, 99th percentile and maximum latency in microseconds.
+        """
+
+        if not self.samples:
+            return {'bars': 0}
+
+        samples = np.array(self.samples) * 1e6
+        return {
+            'bars': len(samples),
+            'mean_us': float(samples.mean()),
+            'p50_us': float(np.percentile(samples, 50)),
+            'p99_us': float(np.percentile(samples, 99)),
+            'max_us': float(samples.max()),
+        }
+
+class PaperTrader:
+    """
+    A class to trade one symbol bar by bar with a tuned parameter set.
+
+    Applies the same signals, position sizing, commission and TP/SL rules as params_backtest,
+    emitting fill and equity events instead of returning a history.
+    """
+
+    def __init__(self, symbol: str, params: dict, cash: float = 1_000_000):
+        self.symbol = symbol
+        self.params = params
+        self.cash = cash
+        self.signals = OnlineSignals(params)
+        self.long_book = PositionBook("LONG", params['take_profit'], params['stop_loss'])
+        self.short_book = PositionBook("SHORT", params['take_profit'], params['stop_loss'])
+        self.latency = LatencyStats()
+
+    def value(self, price: float) -> float:
+        """
+        Portfolio value at the given price.
+        """
+
+        return self.cash + self.long_book.value(price) + self.short_book.value(price)
+
+    def on_bar(self, bar: Bar) -> list[dict]:
+        """
+        Process a bar and return the events it produced.
+
+        Parameters:
+            bar (Bar): New bar.
+
+        Returns:
+            list[dict]: Fill events followed by one equity event, nothing for an incomplete bar.
+        """
+
+        close = bar.close
+        events = []
+
+        # Signals include the current bar, as in the backtest
+        buy_signal, sell_signal = self.signals.update(close)
+
+        # Incomplete bars feed the indicators only, as in simulate_signals
+        if not bar.complete:
+            return events
+
+        # Close positions that hit take profit or stop loss
+        for _, entry_price, n_shares, reason in self.long_book.close_triggered(close):
+            self.cash += close * n_shares * (1 - COM)
+            pnl = (close - entry_price) * n_shares * (1 - COM)
+            events.append(self._fill(bar, "CLOSE_LONG", n_shares, reason, pnl))
+
+        for _, entry_price, n_shares, reason in self.short_book.close_triggered(close):
+            pnl = (entry_price - close) * n_shares * (1 - COM)
+            self.cash += pnl + entry_price * n_shares
+            events.append(self._fill(bar, "CLOSE_SHORT", n_shares, reason, pnl))
+
+        # --- BUY ---
+        if buy_signal:
+            n_shares = self.cash * self.params['available_cash_pct'] / close
+            position_value = close * n_shares * (1 + COM)
+            if self.cash > position_value:
+                self.cash -= position_value
+                self.long_book.open(bar.time, close, n_shares)
+                events.append(self._fill(bar, "BUY", n_shares))
+
+        # --- SELL ---
+        if sell_signal:
+            n_shares = self.cash * self.params['available_cash_pct'] / close
+            position_value = close * n_shares * (1 + COM)
+            if self.cash > position_value:
+                self.cash -= position_value
+                self.short_book.open(bar.time, close, n_shares)
+                events.append(self._fill(bar, "SELL", n_shares))
+
+        events.append({'type': 'equity', 'symbol': bar.symbol, 'time': bar.time,
+                       'cash': self.cash, 'value': self.value(close)})
+
+        return events
+
+    def _fill(self, bar: Bar, action: str, n_shares: float, reason: str | None = None, pnl: float | None = None) -> dict:
+        return {'type': 'fill', 'symbol': bar.symbol, 'time': bar.time, 'action': action,
+                'price': bar.close, 'n_shares': n_shares, 'reason': reason, 'pnl': pnl}
+
+class ListSink:
+    """
+    A class to keep every event in memory.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event: dict):
+        self.events.append(event)
+
+class JsonlSink:
+    """
+    A class to append every event to a JSON lines file.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, 'a')
+
+    def __call__(self, event: dict):
+        self.file.write(json.dumps(event) + '\n')
+
+    def close(self):
+        self.file.close()
+
+async def _emit(sink, event: dict):
+    result = sink(event)
+    if inspect.isawaitable(result):
+        await result
+
+async def _process(trader: PaperTrader, bar: Bar, sink):
+    start = time.perf_counter()
+    events = trader.on_bar(bar)
+    if sink is not None:
+        for event in events:
+            await _emit(sink, event)
+    trader.latency.add(time.perf_counter() - start)
+
+async def run_trader(feed, trader: PaperTrader, sink=None):
+    """
+    Consume a single-symbol feed with a paper trader until the feed ends.
+
+    Parameters:
+        feed: Async iterable of Bar objects.
+        trader (PaperTrader): Trader for the feed's symbol.
+        sink (callable | None): Receives every event, may be a coroutine function.
+
+    Returns:
+        PaperTrader: The trader.
+
+    Raises:
+        ValueError: If the feed carries a bar of another symbol.
+    """
+
+    async for bar in feed:
+        if bar.symbol != trader.symbol:
+            raise ValueError(f"Bar of {bar.symbol} in the feed of {trader.symbol}, use run_router for multi-symbol feeds")
+        await _process(trader, bar, sink)
+
+    return trader
+
+async def run_router(feed, traders: dict, params: dict, cash: float = 1_000_000, sink=None) -> dict:
+    """
+    Consume a feed carrying any number of symbols, routing every bar to the trader of its symbol.
+
+    A trader is created on the first bar of each new symbol.
+
+    Parameters:
+        feed: Async iterable of Bar objects.
+        traders (dict): Symbol to PaperTrader, shared by the feeds of a run and filled in place.
+        params (dict): Tuned hyperparameters of the new traders.
+        cash (float): Initial cash of each new trader.
+        sink (callable | None): Receives every event, may be a coroutine function.
+
+    Returns:
+        dict: Symbol to PaperTrader.
+    """
+
+    async for bar in feed:
+        trader = traders.get(bar.symbol)
+        if trader is None:
+            trader = traders[bar.symbol] = PaperTrader(bar.symbol, params, cash)
+        await _process(trader, bar, sink)
+
+    return traders
+
+async def run_paper(feeds: dict, params: dict, cash: float = 1_000_000, sink=None) -> dict:
+    """
+    Paper trade several symbols concurrently, one trader (and cash pool) per symbol.
+
+    Bars are routed by their symbol, so a feed may carry one symbol (a ReplayFeed) or many
+    (a SocketFeed multiplexing an exchange connection).
+
+    Parameters:
+        feeds (dict): Feed name (e.g. its symbol) to async iterable of Bar objects.
+        params (dict): Tuned hyperparameters (e.g. study.best_params).
+        cash (float): Initial cash of each trader.
+        sink (callable | None): Receives every fill and equity event.
+
+    Returns:
+        dict: Symbol to PaperTrader, whose latency attribute holds the per-bar metrics.
+    """
+
+    traders = {}
+    await asyncio.gather(*(run_router(feed, traders, params, cash, sink) for feed in feeds.values()))
+
+    return traders
+
+def latency_report(traders: dict) -> pd.DataFrame:
+    """
+    Per-symbol latency summary of a paper trading run.
+
+    Parameters:
+        traders (dict): Symbol to PaperTrader, as returned by run_paper.
+
+    Returns:
+        pd.DataFrame: One row of latency metrics per symbol.
+    """
+
+    return pd.DataFrame({symbol: trader.latency.summary() for symbol, trader in traders.items()}).T
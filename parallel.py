@@ -0,0 +1,168 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import TimeSeriesSplit
+
+from backtest import run_backtest, market_view
+from models import MarketView
+
+class SharedFrame:
+    """
+    A class to publish the columns of a DataFrame once in shared memory.
+
+    Workers rebuild the frame from the shared blocks instead of receiving a pickled copy per task.
+    The complete-rows mask is computed on every column of the data and published along with the
+    columns, so workers skip the same rows as a backtest on the full frame.
+    """
+
+    def __init__(self, data: pd.DataFrame, columns=('Datetime', 'Open', 'High', 'Low', 'Close')):
+        self._blocks = []
+        self.spec = {}
+        self.attrs = dict(data.attrs)
+
+        for column in columns:
+            if column not in data:
+                continue
+            values = data[column]
+            if column == 'Datetime':
+                values = pd.to_datetime(values)
+            self.spec[column] = self._publish(values.to_numpy())
+
+        self.complete_spec = self._publish(data.notna().all(axis=1).to_numpy())
+
+    def _publish(self, values: np.ndarray) -> tuple:
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        self._blocks.append(block)
+
+        return block.name, values.dtype.str, values.shape
+
+    def close(self):
+        """
+        Release and remove the shared memory blocks.
+        """
+
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+def attach_frame(spec: dict, attrs: dict | None = None):
+    """
+    Rebuild a DataFrame backed by the shared memory blocks of a SharedFrame.
+
+    Parameters:
+        spec (dict): SharedFrame.spec of the published frame.
+        attrs (dict | None): SharedFrame.attrs of the published frame (e.g. its bars per year).
+
+    Returns:
+        tuple: (DataFrame, list of attached SharedMemory blocks to keep alive).
+    """
+
+    blocks = []
+    columns = {}
+    for column, block_spec in spec.items():
+        columns[column], block = _attach_array(block_spec)
+        blocks.append(block)
+
+    data = pd.DataFrame(columns, copy=False)
+    data.attrs.update(attrs or {})
+
+    return data, blocks
+
+def _attach_array(block_spec: tuple):
+    name, dtype, shape = block_spec
+    block = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf), block
+
+# Per worker process state
+_worker = {}
+
+def _init_worker(spec: dict, attrs: dict, complete_spec: tuple):
+    data, blocks = attach_frame(spec, attrs)
+    complete, block = _attach_array(complete_spec)
+    view = market_view(data)
+
+    _worker['data'] = data
+    _worker['blocks'] = blocks + [block]
+    # Rows complete in the parent's full frame, not only in the published columns
+    _worker['view'] = MarketView(view.times, view.closes, complete)
+
+def _run_fold(start: int, stop: int, params: dict, max_drawdown_stop: float | None) -> float:
+    test = _worker['data'].iloc[start:stop]
+    return run_backtest(test, params, cash=1_000_000, view=_worker['view'][start:stop], equity=False, calmar=True,
+                        max_drawdown_stop=max_drawdown_stop).calmar
+
+class FoldExecutor:
+    """
+    A class to run the walk-forward folds of a trial in parallel worker processes.
+
+    The market data is published once through shared memory when the executor starts. One executor
+    can be shared by all the threads of a threaded study. When trials already run in several processes,
+    give each one an executor with os.cpu_count() // n_trial_processes workers to avoid oversubscription.
+    """
+
+    def __init__(self, data: pd.DataFrame, n_workers: int | None = None):
+        self.n_rows = len(data)
+        self.n_workers = n_workers or os.cpu_count()
+        self._frame = SharedFrame(data)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=mp.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self._frame.spec, self._frame.attrs, self._frame.complete_spec),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self):
+        """
+        Stop the worker processes and release the shared memory.
+        """
+
+        self._pool.shutdown()
+        self._frame.close()
+
+    def fold_results(self, params: dict, n_splits: int = 5, max_drawdown_stop: float | None = None):
+        """
+        Submit every walk-forward fold of a parameter set to the pool.
+
+        Parameters:
+            params (dict): Dictionary of hyperparameters.
+            n_splits (int): Number of splits for time series cross-validation.
+            max_drawdown_stop (float | None): Abort a fold's simulation once its drawdown reaches this fraction.
+
+        Returns:
+            list[concurrent.futures.Future]: One future per fold, in fold order, resolving to its Calmar ratio.
+        """
+
+        tscv = TimeSeriesSplit(n_splits=n_splits)
+        futures = []
+        for _, test_index in tscv.split(np.empty(self.n_rows)):
+            # Test folds are contiguous ranges of rows
+            futures.append(self._pool.submit(_run_fold, int(test_index[0]), int(test_index[-1]) + 1, params, max_drawdown_stop))
+
+        return futures
+
+    def walk_forward(self, params: dict, n_splits: int = 5) -> float:
+        """
+        Run the walk-forward evaluation of a parameter set with the folds in parallel.
+
+        Parameters:
+            params (dict): Dictionary of hyperparameters.
+            n_splits (int): Number of splits for time series cross-validation.
+
+        Returns:
+            float: Average Calmar ratio across all splits.
+        """
+
+        return np.mean([future.result() for future in self.fold_results(params, n_splits)])
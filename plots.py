@@ -1,53 +1,189 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
-def plot_portfolio_value(portfolio_values):
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Select the points of a curve to draw with Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are kept and every bucket in between contributes the point forming
+    the largest triangle with the previous pick and the next bucket's mean. The global minimum and
+    maximum are always added, so drawdowns and peaks survive (up to n_out + 2 points).
+
+    Parameters:
+        x (array-like): Increasing x values (numbers or datetime64).
+        y (array-like): Values of the curve.
+        n_out (int): Target number of points, e.g. about twice the plot width in pixels.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points.
+    """
+
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').view(np.int64)
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket edges over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+
+    for k in range(n_out - 2):
+        start, stop = edges[k], edges[k + 1]
+
+        # Mean of the next bucket (the last point for the last bucket)
+        next_start, next_stop = stop, edges[k + 2] if k + 2 < len(edges) else n
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop].mean()
+
+        # Twice the triangle areas, for every candidate of the bucket at once
+        areas = np.abs((x[previous] - mean_x) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[k + 1] = previous
+
+    return np.union1d(selected, [np.argmin(y), np.argmax(y)])
+
+def downsample(x, y, max_points: int | None):
+    """
+    Downsample a curve with lttb() when it has more than max_points points.
+
+    Returns:
+        tuple: (x, y) as np.ndarray.
+    """
+
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if max_points is None or len(y) <= max_points:
+        return x, y
+
+    index = lttb(x, y, max_points)
+    return x[index], y[index]
+
+def _figure(path: str | None, figsize=(12, 6)):
+    # Files are rendered on a bare Figure, which needs no GUI backend
+    return Figure(figsize=figsize) if path is not None else plt.figure(figsize=figsize)
+
+def _finish(fig, path: str | None, dpi: int = 100):
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+
+def _max_points(fig, max_points: int | str | None, n_axes_columns: int = 1, dpi: int = 100):
+    # 'auto' targets two points per horizontal pixel of each plot
+    if max_points == 'auto':
+        return int(2 * fig.get_figwidth() * dpi / n_axes_columns)
+    return max_points
+
+def plot_portfolio_value(portfolio_values, path: str | None = None, max_points: int | str | None = 'auto'):
     """
     Plot the portfolio value over time.
-    
+
     Parameters:
         portfolio_values (list or pd.Series): Portfolio values over time.
+        path (str | None): Save the plot to this file (.png, .svg, ...) without a GUI instead of showing it.
+        max_points (int | str | None): Downsample the curve to this many points, 'auto' to fit
+            the figure width, None to draw every bar.
 
     Returns:
         None
     """
-    
-    plt.figure(figsize=(12, 6))
-    plt.plot(portfolio_values)
-    plt.title('Portfolio value over time (train)')
-    plt.xlabel('Time')
-    plt.ylabel('Portfolio value')
-    plt.show()
 
-def plot_test_validation(test_portfolio, validation_portfolio, test, validation):
+    fig = _figure(path)
+    ax = fig.add_subplot()
+    x, y = downsample(np.arange(len(portfolio_values)), portfolio_values, _max_points(fig, max_points))
+    ax.plot(x, y)
+    ax.set_title('Portfolio value over time (train)')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Portfolio value')
+    _finish(fig, path)
+
+def plot_test_validation(test_portfolio, validation_portfolio, test, validation, path: str | None = None,
+                         max_points: int | str | None = 'auto'):
     """
     Plot the portfolio value for test and validation sets.
-    
+
     Parameters:
         test_portfolio (list or pd.Series): Portfolio values over time for the test set.
         validation_portfolio (list or pd.Series): Portfolio values over time for the validation set.
         test (pd.DataFrame): Test market data with datetime information.
         validation (pd.DataFrame): Validation market data with datetime information.
+        path (str | None): Save the plot to this file (.png, .svg, ...) without a GUI instead of showing it.
+        max_points (int | str | None): Downsample each curve to this many points, 'auto' to fit
+            the figure width, None to draw every bar.
 
     Returns:
         None
     """
-    
+
     test_df = pd.DataFrame({
-        'Date': test['Datetime'].reset_index(drop=True),
+        'Date': pd.to_datetime(test['Datetime']).reset_index(drop=True),
         'Portfolio Value': test_portfolio
     })
 
     validation_df = pd.DataFrame({
-        'Date': validation['Datetime'].reset_index(drop=True),
+        'Date': pd.to_datetime(validation['Datetime']).reset_index(drop=True),
         'Portfolio Value': validation_portfolio
     })
-    
-    plt.figure(figsize=(12, 6))
-    plt.plot(test_df['Date'], test_df['Portfolio Value'], label='Test', color='red')
-    plt.plot(validation_df['Date'], validation_df['Portfolio Value'], label='Validation', color='green')
-    plt.title('Portfolio value over time (test + validation)')
-    plt.xlabel('Date')
-    plt.ylabel('Portfolio value')
-    plt.legend()
-    plt.show()
\ No newline at end of file
+
+    fig = _figure(path)
+    ax = fig.add_subplot()
+    max_points = _max_points(fig, max_points)
+    ax.plot(*downsample(test_df['Date'], test_df['Portfolio Value'], max_points), label='Test', color='red')
+    ax.plot(*downsample(validation_df['Date'], validation_df['Portfolio Value'], max_points), label='Validation', color='green')
+    ax.set_title('Portfolio value over time (test + validation)')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Portfolio value')
+    ax.legend()
+    _finish(fig, path)
+
+def plot_small_multiples(curves: dict, times=None, path: str | None = None, ncols: int = 4,
+                         max_points: int | str | None = 'auto', title: str = 'Portfolio value'):
+    """
+    Plot many equity curves (trials, symbols, ...) as a grid of small plots sharing the axes.
+
+    Parameters:
+        curves (dict): Label to portfolio values.
+        times (array-like | None): Shared x values (e.g. the Datetime column), bar numbers by default.
+        path (str | None): Save the plot to this file (.png, .svg, ...) without a GUI instead of showing it.
+        ncols (int): Number of plots per row.
+        max_points (int | str | None): Downsample each curve to this many points, 'auto' to fit
+            the width of one plot, None to draw every bar.
+        title (str): Title of the figure.
+
+    Returns:
+        None
+    """
+
+    ncols = max(1, min(ncols, len(curves)))
+    nrows = -(-len(curves) // ncols)
+    figsize = (3 * ncols, 2.2 * nrows)
+
+    fig = _figure(path, figsize)
+    axes = fig.subplots(nrows, ncols, sharex=True, sharey=True, squeeze=False).ravel()
+    max_points = _max_points(fig, max_points, ncols)
+
+    for ax, (label, values) in zip(axes, curves.items()):
+        x = np.arange(len(values)) if times is None else pd.to_datetime(np.asarray(times)[-len(values):])
+        ax.plot(*downsample(x, values, max_points), linewidth=0.8)
+        ax.set_title(str(label), fontsize=9)
+        ax.tick_params(labelsize=7)
+
+    # Hide the unused cells of the last row
+    for ax in axes[len(curves):]:
+        ax.set_visible(False)
+
+    fig.suptitle(title)
+    fig.autofmt_xdate()
+    _finish(fig, path)
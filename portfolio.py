@@ -0,0 +1,253 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import COM
+from models import PositionBook, PortfolioResult
+from signals import strategy_signals
+
+def _symbol_signals(closes: pd.DataFrame, params: dict):
+    # One-off computation per symbol, so the indicator cache would only hold memory
+    buy_signals, sell_signals = strategy_signals(closes, params, cache=None)
+
+    return buy_signals.to_numpy(dtype=bool), sell_signals.to_numpy(dtype=bool)
+
+def portfolio_signals(universe: dict, params: dict, n_workers: int | None = None) -> dict:
+    """
+    Generate the combined buy and sell signals of every symbol, in parallel worker processes.
+
+    Only the Close column of each symbol is sent to the workers.
+
+    Parameters:
+        universe (dict): Symbol to market data DataFrame.
+        params (dict): Dictionary of hyperparameters.
+        n_workers (int | None): Number of worker processes, os.cpu_count() by default; 1 computes in this process.
+
+    Returns:
+        dict: Symbol to (buy_signal, sell_signal) as np.ndarray of boolean values aligned with its data.
+    """
+
+    symbols = list(universe)
+    closes = [universe[symbol][['Close']] for symbol in symbols]
+    n_workers = min(n_workers or os.cpu_count(), len(symbols))
+
+    if n_workers <= 1:
+        return {symbol: _symbol_signals(close, params) for symbol, close in zip(symbols, closes)}
+
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('spawn')) as pool:
+        results = pool.map(_symbol_signals, closes, [params] * len(symbols))
+        return dict(zip(symbols, results))
+
+def _merge_blocks(times: list, columns: list, chunk_size: int):
+    """
+    Merge the bars of every symbol into time-ordered blocks of events.
+
+    Each block holds the bars of every symbol up to a boundary time, at most chunk_size bars per
+    symbol, so memory stays bounded by the number of symbols times chunk_size. Bars at the same
+    time are ordered by symbol and never split across blocks.
+
+    Parameters:
+        times (list): Per symbol, ascending datetime64 arrays.
+        columns (list): Per-symbol arrays (e.g. closes) gathered along with the times.
+
+    Yields:
+        tuple: Symbol index, time and one array per column of the block's events, in time order.
+    """
+
+    cursors = [0] * len(times)
+
+    while True:
+        active = [s for s in range(len(times)) if cursors[s] < len(times[s])]
+        if not active:
+            return
+
+        boundary = min(times[s][min(cursors[s] + chunk_size, len(times[s])) - 1] for s in active)
+
+        slices = []
+        for s in active:
+            stop = int(np.searchsorted(times[s], boundary, side='right'))
+            slices.append((s, cursors[s], stop))
+            cursors[s] = stop
+
+        block_times = np.concatenate([times[s][start:stop] for s, start, stop in slices])
+        order = np.argsort(block_times, kind='stable')
+        ids = np.concatenate([np.full(stop - start, s, dtype=np.int32) for s, start, stop in slices])
+
+        yield (ids[order], block_times[order],
+               *(np.concatenate([column[s][start:stop] for s, start, stop in slices])[order] for column in columns))
+
+def portfolio_simulate(symbols: list[str], times: list, closes: list, buy_signals: list, sell_signals: list,
+                       params: dict, cash: float, equity: bool = True, trade_stats: bool = False,
+                       chunk_size: int = 65_536) -> PortfolioResult:
+    """
+    Simulate the trading strategy over several symbols sharing one cash balance.
+
+    Bars of all the symbols are processed in time order (same-time bars in symbol order) with the
+    rules of simulate(): each bar first closes its symbol's positions that hit take profit or stop
+    loss, then opens a long and/or short position sized on the shared cash. The portfolio value is
+    kept incrementally, marking every symbol at its latest close, and recorded once per time of the
+    union index.
+
+    Parameters:
+        symbols (list[str]): Symbol names.
+        times (list): Per symbol, ascending bar timestamps as datetime64[ns] arrays.
+        closes (list): Per symbol, close prices as float arrays.
+        buy_signals (list): Per symbol, boolean buy signals.
+        sell_signals (list): Per symbol, boolean sell signals.
+        params (dict): Dictionary with 'stop_loss', 'take_profit' and 'available_cash_pct'.
+        cash (float): Initial shared cash.
+        equity (bool): Record the portfolio value at every time of the union index.
+        trade_stats (bool): Count winning and losing trades.
+        chunk_size (int): Maximum bars per symbol merged at once.
+
+    Returns:
+        PortfolioResult: Final cash plus the requested outputs.
+    """
+
+    # Params
+    SL = params['stop_loss']
+    TP = params['take_profit']
+    available_cash_pct = params['available_cash_pct']
+
+    n_symbols = len(symbols)
+    long_books = [PositionBook("LONG", TP, SL) for _ in range(n_symbols)]
+    short_books = [PositionBook("SHORT", TP, SL) for _ in range(n_symbols)]
+
+    # Value of each symbol's open positions at its latest close, and their total
+    marks = [0.0] * n_symbols
+    holdings = 0.0
+    last_close = [None] * n_symbols
+
+    portfolio_value = [] if equity else None
+    value_times = [] if equity else None
+
+    positive_trades = 0
+    negative_trades = 0
+
+    for ids, block_times, block_closes, block_buys, block_sells in _merge_blocks(times, [closes, buy_signals, sell_signals], chunk_size):
+        # Python scalars (integer nanoseconds for the times) are faster to loop over
+        ids, block_closes, block_buys, block_sells = ids.tolist(), block_closes.tolist(), block_buys.tolist(), block_sells.tolist()
+        block_times = block_times.view(np.int64).tolist()
+        n_events = len(ids)
+
+        for k, (s, timestamp, close, buy_signal, sell_signal) in enumerate(zip(ids, block_times, block_closes, block_buys, block_sells)):
+            long_book = long_books[s]
+            short_book = short_books[s]
+            last_close[s] = close
+
+            # Close long positions that hit take profit or stop loss
+            if long_book:
+                for _, entry_price, n_shares, _ in long_book.close_triggered(close):
+                    cash += close * n_shares * (1 - COM)
+                    if trade_stats:
+                        if (close - entry_price) * n_shares * (1 - COM) >= 0:
+                            positive_trades += 1
+                        else:
+                            negative_trades += 1
+
+            # Close short positions that hit take profit or stop loss
+            if short_book:
+                for _, entry_price, n_shares, _ in short_book.close_triggered(close):
+                    pnl = (entry_price - close) * n_shares * (1 - COM)
+                    cash += pnl + entry_price * n_shares
+                    if trade_stats:
+                        if pnl >= 0:
+                            positive_trades += 1
+                        else:
+                            negative_trades += 1
+
+            # --- BUY ---
+            if buy_signal:
+                n_shares = cash * available_cash_pct / close
+                position_value = close * n_shares * (1 + COM)
+                if cash > position_value:
+                    cash -= position_value
+                    long_book.open(timestamp, close, n_shares)
+
+            # --- SELL ---
+            if sell_signal:
+                n_shares = cash * available_cash_pct / close
+                position_value = close * n_shares * (1 + COM)
+                if cash > position_value:
+                    cash -= position_value
+                    short_book.open(timestamp, close, n_shares)
+
+            # Re-mark only the symbol of this bar
+            mark = long_book.value(close) + short_book.value(close)
+            holdings += mark - marks[s]
+            marks[s] = mark
+
+            # Record once every bar of this time has been processed
+            if equity and (k + 1 == n_events or block_times[k + 1] != timestamp):
+                portfolio_value.append(cash + holdings)
+                value_times.append(timestamp)
+
+    # Close remaining positions at each symbol's last price
+    for s in range(n_symbols):
+        close = last_close[s]
+        for _, entry_price, n_shares in long_books[s].close_all():
+            pnl = (close - entry_price) * n_shares * (1 - COM)
+            cash += close * n_shares * (1 - COM)
+            if pnl >= 0:
+                positive_trades += 1
+            else:
+                negative_trades += 1
+
+        for _, entry_price, n_shares in short_books[s].close_all():
+            pnl = (entry_price - close) * n_shares * (1 - COM)
+            cash += pnl + entry_price * n_shares
+            if pnl >= 0:
+                positive_trades += 1
+            else:
+                negative_trades += 1
+
+    result = PortfolioResult(cash=cash, portfolio_value=portfolio_value, symbols=list(symbols))
+
+    if equity:
+        result.times = np.array(value_times, dtype='datetime64[ns]')
+
+    if trade_stats:
+        result.positive_trades = positive_trades
+        result.negative_trades = negative_trades
+
+    return result
+
+def portfolio_backtest(universe: dict, params: dict, cash: float = 1_000_000, n_workers: int | None = None,
+                       **outputs) -> PortfolioResult:
+    """
+    Backtest the strategy on a universe of symbols sharing one cash balance.
+
+    Signals are generated per symbol in parallel, then every symbol keeps only its complete rows
+    (as in simulate_signals) and the bars are simulated on the union of their times. Per symbol,
+    only the times, closes and signals are kept (18 bytes per bar), so hundreds of symbols fit in
+    one process.
+
+    Parameters:
+        universe (dict): Symbol to market data DataFrame with 'Datetime' and 'Close' columns.
+        params (dict): Dictionary of hyperparameters.
+        cash (float): Initial shared cash.
+        n_workers (int | None): Number of processes generating the signals.
+        **outputs: Output flags forwarded to portfolio_simulate() (equity, trade_stats, chunk_size).
+
+    Returns:
+        PortfolioResult: Final cash plus the requested outputs.
+    """
+
+    signals = portfolio_signals(universe, params, n_workers)
+
+    symbols = list(universe)
+    times, closes, buys, sells = [], [], [], []
+    for symbol in symbols:
+        data = universe[symbol]
+        buy_signals, sell_signals = signals[symbol]
+        complete = data.notna().all(axis=1).to_numpy()
+
+        times.append(pd.to_datetime(data['Datetime']).to_numpy()[complete].astype('datetime64[ns]'))
+        closes.append(data['Close'].to_numpy(dtype=float)[complete])
+        buys.append(buy_signals[complete])
+        sells.append(sell_signals[complete])
+
+    return portfolio_simulate(symbols, times, closes, buys, sells, params, cash, **outputs)
@@ -1,7 +1,182 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 import ta
 
-def rsi_signals(data: pd.DataFrame, rsi_window: int, rsi_lower: int, rsi_upper: int):
+class IndicatorCache:
+    """
+    Thread-safe LRU cache of indicator series shared across optimization trials.
+
+    Entries are keyed by (data fingerprint, indicator, window parameters) and evicted
+    least recently used first once the stored series exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Parameters:
+            key (tuple): Cache key.
+            compute (callable): Function without arguments that builds the value.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # Compute outside the lock so other threads are not blocked
+        value = compute()
+        nbytes = sum(_nbytes(item) for item in (value if isinstance(value, tuple) else (value,)))
+
+        with self._lock:
+            if key not in self._entries and nbytes <= self.max_bytes:
+                self._entries[key] = (value, nbytes)
+                self._nbytes += nbytes
+                while self._nbytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._nbytes -= evicted
+
+        return value
+
+    def stats(self) -> dict:
+        """
+        Cache counters: hits, misses, number of entries and stored bytes.
+        """
+
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self._nbytes}
+
+    def clear(self):
+        """
+        Drop every cached entry and reset the counters.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+def _nbytes(value) -> int:
+    if isinstance(value, pd.Series):
+        return value.memory_usage(index=True)
+    return getattr(value, 'nbytes', 0)
+
+# Shared by every trial of the process
+indicator_cache = IndicatorCache()
+
+def data_fingerprint(data: pd.DataFrame) -> str:
+    """
+    Hash the close prices and index of the data to identify it in caches.
+    
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices.
+
+    Returns:
+        str: Hex digest identifying the data.
+    """
+    
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(data.Close.to_numpy(dtype=float).tobytes())
+    digest.update(pd.util.hash_pandas_object(data.index, index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+def rsi_indicator(data: pd.DataFrame, window: int, cache: IndicatorCache | None = indicator_cache, fingerprint: str | None = None) -> pd.Series:
+    """
+    Compute the RSI of the close prices, reusing cached results.
+    
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices.
+        window (int): Window size for RSI calculation.
+        cache (IndicatorCache | None): Cache to use, None to always recompute.
+        fingerprint (str | None): Precomputed data fingerprint.
+
+    Returns:
+        pd.Series: RSI values.
+    """
+    
+    def compute():
+        return ta.momentum.RSIIndicator(data.Close, window=window).rsi()
+
+    if cache is None:
+        return compute()
+
+    return cache.get_or_compute((fingerprint or data_fingerprint(data), 'rsi', window), compute)
+
+def ema_indicator(data: pd.DataFrame, window: int, cache: IndicatorCache | None = indicator_cache, fingerprint: str | None = None) -> pd.Series:
+    """
+    Compute the EMA of the close prices, reusing cached results.
+    
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices.
+        window (int): Window size for EMA calculation.
+        cache (IndicatorCache | None): Cache to use, None to always recompute.
+        fingerprint (str | None): Precomputed data fingerprint.
+
+    Returns:
+        pd.Series: EMA values.
+    """
+    
+    def compute():
+        return ta.trend.EMAIndicator(data.Close, window=window).ema_indicator()
+
+    if cache is None:
+        return compute()
+
+    return cache.get_or_compute((fingerprint or data_fingerprint(data), 'ema', window), compute)
+
+def macd_indicator(data: pd.DataFrame, short_window: int, long_window: int, signal_window: int,
+                   cache: IndicatorCache | None = indicator_cache, fingerprint: str | None = None):
+    """
+    Compute the MACD and signal lines of the close prices, reusing cached results.
+
+    The MACD line is built from the cached fast and slow EMAs, which is what ta.trend.MACD does internally.
+    
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices.
+        short_window (int): Window size for the fast EMA.
+        long_window (int): Window size for the slow EMA.
+        signal_window (int): Window size for the signal line EMA.
+        cache (IndicatorCache | None): Cache to use, None to always recompute.
+        fingerprint (str | None): Precomputed data fingerprint.
+
+    Returns:
+        tuple: (macd_line, signal_line) as pd.Series.
+    """
+    
+    if cache is None:
+        macd = ta.trend.MACD(data.Close, window_slow=long_window, window_fast=short_window, window_sign=signal_window)
+        return macd.macd(), macd.macd_signal()
+    fingerprint = fingerprint or data_fingerprint(data)
+
+    def compute():
+        fast = ema_indicator(data, short_window, cache, fingerprint)
+        slow = ema_indicator(data, long_window, cache, fingerprint)
+        macd_line = fast - slow
+        signal_line = ta.trend.EMAIndicator(macd_line, window=signal_window).ema_indicator()
+        return macd_line, signal_line
+
+    return cache.get_or_compute((fingerprint, 'macd', short_window, long_window, signal_window), compute)
+
+def rsi_signals(data: pd.DataFrame, rsi_window: int, rsi_lower: int, rsi_upper: int,
+                cache: IndicatorCache | None = indicator_cache, fingerprint: str | None = None):
     """
     Generate buy and sell signals based on RSI indicator.
     
@@ -10,13 +185,14 @@ def rsi_signals(data: pd.DataFrame, rsi_window: int, rsi_lower: int, rsi_upper:
         rsi_window (int): Window size for RSI calculation.
         rsi_lower (int): Lower threshold for buy signal.
         rsi_upper (int): Upper threshold for sell signal.
+        cache (IndicatorCache | None): Indicator cache, None to always recompute.
+        fingerprint (str | None): Precomputed data fingerprint.
 
     Returns:
         tuple: (buy_signal, sell_signal) as pd.Series of boolean values.
     """
     
-    rsi_indicator = ta.momentum.RSIIndicator(data.Close, window=rsi_window)
-    rsi = rsi_indicator.rsi()
+    rsi = rsi_indicator(data, rsi_window, cache, fingerprint)
 
     # Fijo
     buy_signal = rsi < rsi_lower
@@ -28,7 +204,8 @@ def rsi_signals(data: pd.DataFrame, rsi_window: int, rsi_lower: int, rsi_upper:
 
     return buy_signal, sell_signal
 
-def ema_signals(data: pd.DataFrame, short_window: int, long_window: int):
+def ema_signals(data: pd.DataFrame, short_window: int, long_window: int,
+                cache: IndicatorCache | None = indicator_cache, fingerprint: str | None = None):
     """
     Generate buy and sell signals based on EMA crossover.
 
@@ -36,13 +213,15 @@ def ema_signals(data: pd.DataFrame, short_window: int, long_window: int):
         data (pd.DataFrame): Market data with 'Close' prices.
         short_window (int): Window size for short-term EMA.
         long_window (int): Window size for long-term EMA.
+        cache (IndicatorCache | None): Indicator cache, None to always recompute.
+        fingerprint (str | None): Precomputed data fingerprint.
 
     Returns:
         tuple: (buy_signal, sell_signal) as pd.Series of boolean values.
     """
     
-    short_ema = ta.trend.EMAIndicator(data.Close, window=short_window).ema_indicator()
-    long_ema = ta.trend.EMAIndicator(data.Close, window=long_window).ema_indicator()
+    short_ema = ema_indicator(data, short_window, cache, fingerprint)
+    long_ema = ema_indicator(data, long_window, cache, fingerprint)
 
     # Fijo
     #buy_signal = short_ema > long_ema
@@ -54,7 +233,8 @@ def ema_signals(data: pd.DataFrame, short_window: int, long_window: int):
 
     return buy_signal, sell_signal
 
-def macd_signals(data: pd.DataFrame, short_window: int, long_window: int, signal_window: int):
+def macd_signals(data: pd.DataFrame, short_window: int, long_window: int, signal_window: int,
+                 cache: IndicatorCache | None = indicator_cache, fingerprint: str | None = None):
     """
     Generate buy and sell signals based on MACD indicator.
     
@@ -63,14 +243,14 @@ def macd_signals(data: pd.DataFrame, short_window: int, long_window: int, signal
         short_window (int): Window size for the fast EMA.
         long_window (int): Window size for the slow EMA.
         signal_window (int): Window size for the signal line EMA.
+        cache (IndicatorCache | None): Indicator cache, None to always recompute.
+        fingerprint (str | None): Precomputed data fingerprint.
 
     Returns:
         tuple: (buy_signal, sell_signal) as pd.Series of boolean values.
     """
     
-    macd = ta.trend.MACD(data.Close, window_slow=long_window, window_fast=short_window, window_sign=signal_window)
-    macd_line = macd.macd()
-    signal_line = macd.macd_signal()
+    macd_line, signal_line = macd_indicator(data, short_window, long_window, signal_window, cache, fingerprint)
 
     # Fijo
     buy_signal = macd_line > signal_line
@@ -84,7 +264,9 @@ def macd_signals(data: pd.DataFrame, short_window: int, long_window: int, signal
 
 def combined_signals(rsi_buy, rsi_sell, ema_buy, ema_sell, macd_buy, macd_sell):
     """
-    Combine buy and sell signals from multiple indicators.
+    Combine buy and sell signals from multiple indicators: a signal needs at least 2 of the 3 to agree.
+
+    Works on pd.Series, boolean np.ndarray and bitsignals.PackedSignals alike.
     
     Parameters:
         rsi_buy (pd.Series): Buy signals from RSI.
@@ -98,8 +280,30 @@ def combined_signals(rsi_buy, rsi_sell, ema_buy, ema_sell, macd_buy, macd_sell):
         tuple: (buy_signal, sell_signal) as pd.Series of boolean values.
     """
     
-    # Indicators agreement
-    buy_signal = rsi_buy.astype(int) + ema_buy.astype(int) + macd_buy.astype(int) >= 2
-    sell_signal = rsi_sell.astype(int) + ema_sell.astype(int) + macd_sell.astype(int) >= 2
+    # Indicators agreement (2-of-3 majority, without widening the booleans to integers)
+    buy_signal = (rsi_buy & ema_buy) | (macd_buy & (rsi_buy | ema_buy))
+    sell_signal = (rsi_sell & ema_sell) | (macd_sell & (rsi_sell | ema_sell))
+
+    return buy_signal, sell_signal
+
+def strategy_signals(data: pd.DataFrame, params: dict, cache: IndicatorCache | None = indicator_cache):
+    """
+    Generate the combined buy and sell signals for a full set of strategy parameters.
+    
+    Parameters:
+        data (pd.DataFrame): Market data with 'Close' prices.
+        params (dict): Dictionary of hyperparameters (RSI, EMA and MACD windows and thresholds).
+        cache (IndicatorCache | None): Indicator cache, None to always recompute.
+
+    Returns:
+        tuple: (buy_signal, sell_signal) as pd.Series of boolean values.
+    """
+    
+    # Hash the data once for all indicators
+    fingerprint = data_fingerprint(data) if cache is not None else None
+
+    rsi_buy, rsi_sell = rsi_signals(data, params['rsi_window'], params['rsi_lower'], params['rsi_upper'], cache, fingerprint)
+    ema_buy, ema_sell = ema_signals(data, params['ema_short_window'], params['ema_long_window'], cache, fingerprint)
+    macd_buy, macd_sell = macd_signals(data, params['macd_short_window'], params['macd_long_window'], params['macd_signal_window'], cache, fingerprint)
 
-    return buy_signal, sell_signal
\ No newline at end of file
+    return combined_signals(rsi_buy, rsi_sell, ema_buy, ema_sell, macd_buy, macd_sell)
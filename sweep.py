@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest import population_backtest
+from indicators import build_indicator_bank, load_indicator_bank
+from metrics import BARS_PER_YEAR
+from utils import save_columns, load_columns
+
+# Metrics stored for every grid point, named as in metrics.performance_metrics
+SWEEP_METRICS = {
+    'sharpe': 'Sharpe ratio',
+    'sortino': 'Sortino ratio',
+    'max_drawdown': 'Max drawdown',
+    'calmar': 'Calmar ratio',
+}
+
+def grid_size(grid: dict) -> int:
+    """
+    Number of points of a parameter grid.
+    """
+
+    return int(np.prod([len(values) for values in grid.values()]))
+
+def grid_params(grid: dict, base_params: dict, indices) -> list[dict]:
+    """
+    Build the parameter sets of some grid points.
+
+    Parameters:
+        grid (dict): Parameter name to the list of values swept (e.g. range(5, 51, 5)).
+        base_params (dict): Values of the parameters not in the grid.
+        indices (array-like): Flat indices of the grid points (C order over the grid's keys).
+
+    Returns:
+        list[dict]: One dictionary of hyperparameters per grid point.
+    """
+
+    names = list(grid)
+    values = [list(grid[name]) for name in names]
+    coordinates = np.unravel_index(np.asarray(indices), [len(v) for v in values])
+
+    return [
+        {**base_params, **{name: values[j][coordinates[j][k]] for j, name in enumerate(names)}}
+        for k in range(len(coordinates[0]))
+    ]
+
+def _bank_windows(grid: dict, base_params: dict):
+    """
+    EMA and RSI windows needed by any point of the grid.
+    """
+
+    def values(name):
+        return list(grid[name]) if name in grid else [base_params[name]]
+
+    ema_windows = {int(w) for name in ('ema_short_window', 'ema_long_window', 'macd_short_window', 'macd_long_window') for w in values(name)}
+    rsi_windows = {int(w) for w in values('rsi_window')}
+
+    return sorted(ema_windows), sorted(rsi_windows)
+
+def _data_hash(data: pd.DataFrame) -> str:
+    """
+    Hash every column of the data, so a sweep directory is never resumed with other data of the same length.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([str(column) for column in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data.reset_index(drop=True), index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+class SweepStore:
+    """
+    A class for the results of a grid sweep, one .npz file per completed chunk.
+
+    The directory also holds the sweep specification, the market data and the indicator bank, so
+    a crashed or interrupted sweep resumes from the same inputs. Chunk files are written atomically,
+    so a chunk is either complete or missing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._spec_path = os.path.join(path, 'sweep.json')
+        self.spec = None
+        if os.path.exists(self._spec_path):
+            with open(self._spec_path) as f:
+                self.spec = json.load(f)
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.path, 'data')
+
+    @property
+    def bank_path(self) -> str:
+        return os.path.join(self.path, 'bank')
+
+    @property
+    def n_chunks(self) -> int:
+        return -(-self.spec['n_points'] // self.spec['chunk_size'])
+
+    def chunk_path(self, chunk: int) -> str:
+        return os.path.join(self.path, f'chunk-{chunk:06d}.npz')
+
+    def completed(self) -> set[int]:
+        """
+        Indices of the chunks already written.
+        """
+
+        return {int(name[6:12]) for name in os.listdir(self.path) if name.startswith('chunk-') and name.endswith('.npz')}
+
+    def pending(self) -> list[int]:
+        """
+        Indices of the chunks still to run.
+        """
+
+        done = self.completed()
+        return [chunk for chunk in range(self.n_chunks) if chunk not in done]
+
+    def initialize(self, data: pd.DataFrame, grid: dict, base_params: dict, chunk_size: int,
+                   cash: float, bars_per_year: float):
+        """
+        Write the sweep specification, data and indicator bank, or check them against an existing sweep.
+
+        Raises:
+            ValueError: If the directory holds a sweep with a different specification or data.
+        """
+
+        spec = {
+            'grid': {name: [v.item() if isinstance(v, np.generic) else v for v in values] for name, values in grid.items()},
+            'base_params': {name: value for name, value in base_params.items() if name not in grid},
+            'n_points': grid_size(grid),
+            'chunk_size': chunk_size,
+            'cash': cash,
+            'bars_per_year': bars_per_year,
+            'n_rows': len(data),
+            'data_hash': _data_hash(data),
+        }
+
+        if self.spec is not None:
+            if self.spec != json.loads(json.dumps(spec)):
+                raise ValueError(f"{self.path} holds a sweep with a different specification or data, use another directory to start a new one")
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        save_columns(data.reset_index(drop=True), self.data_path)
+        ema_windows, rsi_windows = _bank_windows(spec['grid'], spec['base_params'])
+        build_indicator_bank(data.reset_index(drop=True), ema_windows, rsi_windows, path=self.bank_path)
+
+        # The specification is written last, marking the sweep as initialized
+        tmp_path = f'{self._spec_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(spec, f)
+        os.replace(tmp_path, self._spec_path)
+        self.spec = spec
+
+    def write_chunk(self, chunk: int, arrays: dict):
+        """
+        Write the results of a chunk atomically.
+        """
+
+        tmp_path = os.path.join(self.path, f'tmp-{chunk:06d}.npz')
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.chunk_path(chunk))
+
+    def results(self) -> pd.DataFrame:
+        """
+        Results of the completed chunks, one row per grid point with its parameters and metrics.
+        """
+
+        chunks = sorted(self.completed())
+        if not chunks:
+            return pd.DataFrame(columns=['index', *self.spec['grid'], 'final_value', *SWEEP_METRICS])
+
+        arrays = [np.load(self.chunk_path(chunk)) for chunk in chunks]
+        columns = {name: np.concatenate([a[name] for a in arrays]) for name in arrays[0].files}
+
+        # Grid coordinates back to parameter values
+        grid = self.spec['grid']
+        coordinates = np.unravel_index(columns['index'], [len(values) for values in grid.values()])
+        for (name, values), coordinate in zip(grid.items(), coordinates):
+            columns[name] = np.asarray(values)[coordinate]
+
+        return pd.DataFrame(columns)[['index', *grid, 'final_value', *SWEEP_METRICS]]
+
+# Per worker process state
+_worker = {}
+
+def _init_worker(path: str):
+    store = SweepStore(path)
+    _worker['store'] = store
+    _worker['data'] = load_columns(store.data_path)
+    _worker['bank'] = load_indicator_bank(store.bank_path)
+
+def _run_chunk(chunk: int) -> int:
+    store = _worker['store']
+    spec = store.spec
+
+    start = chunk * spec['chunk_size']
+    indices = np.arange(start, min(start + spec['chunk_size'], spec['n_points']))
+    params_list = grid_params(spec['grid'], spec['base_params'], indices)
+
+    # Every grid point of the chunk in one vectorized population, with the metrics accumulated bar by bar
+    data = _worker['data']
+    data.attrs['bars_per_year'] = spec['bars_per_year']
+    _, metrics = population_backtest(data, params_list, cash=spec['cash'], bank=_worker['bank'], metrics=True)
+
+    arrays = {'index': indices, 'final_value': metrics['Final value']}
+    arrays.update({key: metrics[name] for key, name in SWEEP_METRICS.items()})
+    store.write_chunk(chunk, arrays)
+
+    return chunk
+
+def sweep(data: pd.DataFrame, grid: dict, base_params: dict, path: str, chunk_size: int = 256,
+          n_workers: int | None = None, cash: float = 1_000_000, bars_per_year: float | None = None) -> pd.DataFrame:
+    """
+    Evaluate every point of a parameter grid, resuming a previous run in the same directory.
+
+    The grid is split into chunks of consecutive flat indices; each chunk is run as one vectorized
+    population on the shared (memory-mapped) indicator bank and its metrics are written to the store.
+    The metrics are accumulated during the simulation, so a chunk needs no (chunk_size, n_bars)
+    portfolio values. Chunks already in the store are skipped.
+
+    Parameters:
+        data (pd.DataFrame): Market data, rows with missing values are skipped as in run_backtest.
+        grid (dict): Parameter name to the values swept, e.g. {'rsi_window': range(5, 51), 'rsi_lower': range(5, 36)}.
+            Use strided ranges for coarser grids.
+        base_params (dict): Values of the hyperparameters not in the grid.
+        path (str): Directory of the results store.
+        chunk_size (int): Grid points per chunk.
+        n_workers (int | None): Number of worker processes, os.cpu_count() by default; 1 runs in this process.
+        cash (float): Initial cash of every backtest.
+        bars_per_year (float | None): Number of bars in a year, to annualize the metrics; by default the
+            'bars_per_year' attribute of the data (see timeframes), else hourly bars.
+
+    Returns:
+        pd.DataFrame: Parameters and metrics of every grid point.
+    """
+
+    if bars_per_year is None:
+        bars_per_year = data.attrs.get('bars_per_year', BARS_PER_YEAR)
+
+    store = SweepStore(path)
+    store.initialize(data, grid, base_params, chunk_size, cash, bars_per_year)
+    pending = store.pending()
+
+    if pending:
+        n_workers = min(n_workers or os.cpu_count(), len(pending))
+        if n_workers <= 1:
+            _init_worker(path)
+            for chunk in pending:
+                _run_chunk(chunk)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(path,)) as pool:
+                for _ in pool.map(_run_chunk, pending):
+                    pass
+
+    return store.results()
+
+def load_sweep(path: str) -> pd.DataFrame:
+    """
+    Load the results of a (possibly incomplete) grid sweep.
+
+    Parameters:
+        path (str): Directory of the results store.
+
+    Returns:
+        pd.DataFrame: Parameters and metrics of every completed grid point.
+    """
+
+    return SweepStore(path).results()
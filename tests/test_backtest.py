@@ -0,0 +1,30 @@
+import os
+import sys
+
+import numpy as np
+import optuna
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import run_backtest, walk_forward
+from benchmark import PARAMS
+from ingest import read_bars
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'aapl_5m_train.csv')
+
+@pytest.fixture(scope='module')
+def data():
+    return read_bars(DATA_PATH)
+
+@pytest.mark.parametrize('max_drawdown_stop', [0.01, 0.02, 0.03, 0.5])
+def test_drawdown_stop_never_scores_above_full_run(data, max_drawdown_stop):
+    full = run_backtest(data, PARAMS, calmar=True, equity=False)
+    stopped = run_backtest(data, PARAMS, calmar=True, equity=False, max_drawdown_stop=max_drawdown_stop)
+    assert stopped.calmar <= full.calmar
+    if stopped.stopped_at is not None:
+        assert stopped.calmar == -np.inf
+
+    full_wf = walk_forward(data, optuna.trial.FixedTrial(PARAMS))
+    stopped_wf = walk_forward(data, optuna.trial.FixedTrial(PARAMS), max_drawdown_stop=max_drawdown_stop)
+    assert stopped_wf <= full_wf
@@ -0,0 +1,27 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import params_backtest
+from benchmark import PARAMS
+from ingest import read_bars
+from paper import ReplayFeed, ListSink, run_paper
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'aapl_5m_train.csv')
+
+def test_paper_equity_matches_params_backtest():
+    # The file has incomplete rows (missing Volume or every value) that the backtest skips
+    data = read_bars(DATA_PATH)
+    _, portfolio_value, _ = params_backtest(data, PARAMS, cash=1_000_000)
+
+    sink = ListSink()
+    asyncio.run(run_paper({'AAPL': ReplayFeed(DATA_PATH, 'AAPL')}, PARAMS, cash=1_000_000, sink=sink))
+    equity = [event['value'] for event in sink.events if event['type'] == 'equity']
+
+    assert len(equity) == len(portfolio_value)
+    np.testing.assert_allclose(equity[-1], portfolio_value[-1], rtol=1e-12)
+    np.testing.assert_allclose(equity, portfolio_value, rtol=1e-12)
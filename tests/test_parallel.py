@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+import optuna
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import walk_forward
+from benchmark import PARAMS
+from ingest import read_bars
+from parallel import FoldExecutor
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'aapl_5m_train.csv')
+
+def test_executor_matches_serial_walk_forward():
+    # The file has rows with a missing Volume only, which both paths must skip
+    data = read_bars(DATA_PATH)
+    assert data['Volume'].isna().sum() > data['Close'].isna().sum()
+
+    serial = walk_forward(data, optuna.trial.FixedTrial(PARAMS))
+    with FoldExecutor(data, n_workers=2) as executor:
+        parallel = walk_forward(data, optuna.trial.FixedTrial(PARAMS), executor=executor)
+
+    np.testing.assert_allclose(parallel, serial, rtol=1e-12)
+
+def test_executor_rejects_unsupported_options():
+    data = read_bars(DATA_PATH).iloc[:2000]
+    with FoldExecutor(data, n_workers=1) as executor:
+        for options in ({'use_bank': True}, {'shared_indicators': True}, {'warmup': 10}, {'bank_path': 'banks'}):
+            with pytest.raises(ValueError):
+                walk_forward(data, optuna.trial.FixedTrial(PARAMS), executor=executor, **options)
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingest import read_bars
+from utils import file_signature, save_columns, load_columns
+
+# Timeframe labels to pandas durations
+TIMEFRAMES = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1h',
+    '2h': '2h',
+    '4h': '4h',
+    '1d': '1D',
+}
+
+# Aggregation of every OHLCV column when bars are merged
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+}
+
+YEAR = pd.Timedelta(days=365.25)
+
+def timeframe_delta(timeframe: str) -> pd.Timedelta:
+    """
+    Duration of a timeframe label such as '5m', '1h' or '1d'.
+    """
+
+    return pd.Timedelta(TIMEFRAMES.get(timeframe, timeframe))
+
+def resample_ohlcv(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate bars into a coarser timeframe.
+
+    Bins are aligned on midnight and labeled by their start; bins without bars are dropped.
+
+    Parameters:
+        data (pd.DataFrame): Bars in the canonical Datetime, Open, High, Low, Close, Volume layout.
+        timeframe (str): Target timeframe label (e.g. '1h').
+
+    Returns:
+        pd.DataFrame: Aggregated bars in the same layout.
+    """
+
+    aggregation = {column: how for column, how in OHLCV_AGGREGATION.items() if column in data}
+
+    bars = (data.set_index(pd.to_datetime(data['Datetime']))[list(aggregation)]
+            .resample(timeframe_delta(timeframe))
+            .agg(aggregation))
+    bars = bars[bars['Close'].notna()].rename_axis('Datetime').reset_index()
+
+    return bars
+
+def infer_bars_per_year(datetimes) -> float:
+    """
+    Estimate the number of bars in a year from the bar times.
+
+    The rate is measured over the calendar span of the data, so session hours, weekends and
+    holidays are accounted for (about 19,700 five-minute bars a year for US stocks against
+    105,120 for a market trading around the clock).
+
+    Parameters:
+        datetimes (array-like): Bar times in ascending order.
+
+    Returns:
+        float: Number of bars in a year.
+
+    Raises:
+        ValueError: If the bars do not span any time.
+    """
+
+    times = pd.to_datetime(np.asarray(datetimes))
+    span = times[-1] - times[0] if len(times) else pd.Timedelta(0)
+    if span <= pd.Timedelta(0):
+        raise ValueError("At least two bars at different times are needed to infer the bars per year")
+
+    return (len(times) - 1) * (YEAR / span)
+
+def bars_per_year(data: pd.DataFrame) -> float:
+    """
+    Number of bars in a year of some market data, as set by the pyramid or inferred from its times.
+
+    Parameters:
+        data (pd.DataFrame): Market data with a 'Datetime' column.
+
+    Returns:
+        float: Number of bars in a year.
+    """
+
+    if 'bars_per_year' in data.attrs:
+        return data.attrs['bars_per_year']
+
+    return infer_bars_per_year(data['Datetime'])
+
+def _tag(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    # Slices, copies and splits of the frame keep its attrs
+    data.attrs['timeframe'] = timeframe
+    data.attrs['bars_per_year'] = infer_bars_per_year(data['Datetime'])
+    return data
+
+def build_pyramid(data: pd.DataFrame, timeframes=('5m', '15m', '1h', '4h')) -> dict:
+    """
+    Build the OHLCV bars of several timeframes from the finest-grained data in one cascade.
+
+    Timeframes are built from the finest up, each one from the coarsest level already built
+    that divides it (e.g. 4h from 1h, 1h from 15m), so only the first level reads every raw bar.
+    The result is the same as resampling the raw data for each timeframe.
+
+    Every frame gets its timeframe and bars per year in its attrs ('timeframe', 'bars_per_year'),
+    which the backtest and the metrics use to annualize.
+
+    Parameters:
+        data (pd.DataFrame): Finest-grained bars in the canonical layout, in time order.
+        timeframes (tuple): Timeframe labels to build, none finer than the data.
+
+    Returns:
+        dict: Timeframe label to bars.
+
+    Raises:
+        ValueError: If a timeframe is finer than the data.
+    """
+
+    data = data.dropna().reset_index(drop=True)
+    spacing = pd.to_datetime(data['Datetime']).diff().min()
+
+    levels = [(spacing, data)]
+    pyramid = {}
+
+    for timeframe in sorted(timeframes, key=timeframe_delta):
+        delta = timeframe_delta(timeframe)
+        if delta < spacing:
+            raise ValueError(f"Timeframe {timeframe} is finer than the data ({spacing})")
+
+        # Coarsest level built so far whose bins nest in the new ones
+        source_delta, source = next(level for level in reversed(levels) if delta % level[0] == pd.Timedelta(0))
+        bars = source.copy() if delta == source_delta else resample_ohlcv(source, timeframe)
+
+        pyramid[timeframe] = _tag(bars, timeframe)
+        levels.append((delta, bars))
+
+    return pyramid
+
+def load_pyramid(path: str, timeframes=('5m', '15m', '1h', '4h'), cache_dir: str | None = 'data/.cache',
+                 hash_contents: bool = False) -> dict:
+    """
+    Read a bar file and build its timeframe pyramid, caching every timeframe as memory-mapped columns.
+
+    The cache is rebuilt whenever the source file changes (as in load_data) or a timeframe is
+    missing from it, so multi-timeframe studies aggregate the raw file only once.
+
+    Parameters:
+        path (str): Finest-grained bar file (any format read by ingest.read_bars).
+        timeframes (tuple): Timeframe labels to load.
+        cache_dir (str | None): Directory of the cache, None to always aggregate.
+        hash_contents (bool): Validate the cache against a hash of the file contents as well.
+
+    Returns:
+        dict: Timeframe label to bars, with 'timeframe' and 'bars_per_year' in their attrs.
+    """
+
+    if cache_dir is None:
+        return build_pyramid(read_bars(path), timeframes)
+
+    signature = file_signature(path, hash_contents)
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.blake2b(signature['path'].encode(), digest_size=4).hexdigest()
+    cache_path = os.path.join(cache_dir, f'{name}-{key}-pyramid')
+    signature_path = os.path.join(cache_path, 'source.json')
+
+    built = []
+    if os.path.exists(signature_path):
+        with open(signature_path) as f:
+            cached = json.load(f)
+        if cached['source'] == signature:
+            built = cached['timeframes']
+            if set(timeframes) <= set(built):
+                return {timeframe: _tag(load_columns(os.path.join(cache_path, timeframe)), timeframe) for timeframe in timeframes}
+
+    # Rebuild the timeframes already cached along with the new ones
+    pyramid = build_pyramid(read_bars(path), sorted(set(built) | set(timeframes), key=timeframe_delta))
+
+    os.makedirs(cache_path, exist_ok=True)
+    for timeframe, bars in pyramid.items():
+        save_columns(bars, os.path.join(cache_path, timeframe))
+
+    # Written last, so an interrupted build is redone
+    with open(signature_path, 'w') as f:
+        json.dump({'source': signature, 'timeframes': list(pyramid)}, f)
+
+    return {timeframe: pyramid[timeframe] for timeframe in timeframes}
+
+def load_timeframe(path: str, timeframe: str, cache_dir: str | None = 'data/.cache') -> pd.DataFrame:
+    """
+    Load the bars of one timeframe of a bar file through the pyramid cache.
+
+    Parameters:
+        path (str): Finest-grained bar file.
+        timeframe (str): Timeframe label.
+        cache_dir (str | None): Directory of the cache.
+
+    Returns:
+        pd.DataFrame: Bars with 'timeframe' and 'bars_per_year' in their attrs.
+    """
+
+    return load_pyramid(path, (timeframe,), cache_dir)[timeframe]
@@ -1,3 +1,9 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
 import pandas as pd
 
 def modify_data(data: pd.DataFrame):
@@ -19,6 +25,120 @@ def modify_data(data: pd.DataFrame):
 
     return data
 
+def save_columns(data: pd.DataFrame, path: str):
+    """
+    Save a DataFrame as one .npy file per column plus a JSON manifest.
+
+    Text columns are stored as fixed-width unicode so every column can be memory-mapped.
+    
+    Parameters:
+        data (pd.DataFrame): Data to save.
+        path (str): Target directory (replaced atomically if it exists).
+
+    Returns:
+        None
+    """
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    os.makedirs(tmp_path, exist_ok=True)
+
+    columns = []
+    for i, column in enumerate(data.columns):
+        values = data[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        np.save(os.path.join(tmp_path, f'{i}.npy'), values)
+        columns.append(str(column))
+
+    with open(os.path.join(tmp_path, 'columns.json'), 'w') as f:
+        json.dump(columns, f)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+def load_columns(path: str, mmap: bool = True) -> pd.DataFrame:
+    """
+    Load a DataFrame saved with save_columns.
+    
+    Parameters:
+        path (str): Directory holding the columns.
+        mmap (bool): Memory-map the column files instead of reading them.
+
+    Returns:
+        pd.DataFrame: Loaded data.
+    """
+
+    with open(os.path.join(path, 'columns.json')) as f:
+        columns = json.load(f)
+
+    mmap_mode = 'r' if mmap else None
+    data = {column: np.load(os.path.join(path, f'{i}.npy'), mmap_mode=mmap_mode) for i, column in enumerate(columns)}
+
+    return pd.DataFrame(data, copy=False)
+
+def file_signature(path: str, hash_contents: bool = False) -> dict:
+    """
+    Identify the version of a source file by its size and modification time, optionally its content hash.
+    
+    Parameters:
+        path (str): Path to the file.
+        hash_contents (bool): Also hash the file contents.
+
+    Returns:
+        dict: Signature of the file.
+    """
+
+    stat = os.stat(path)
+    signature = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    if hash_contents:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        signature['blake2b'] = digest.hexdigest()
+
+    return signature
+
+def load_data(path: str, cache_dir: str | None = 'data/.cache', hash_contents: bool = False) -> pd.DataFrame:
+    """
+    Read a market data CSV file and clean it, caching the cleaned data as memory-mapped columns.
+
+    The cache is rebuilt whenever the size or modification time (or the content hash when
+    hash_contents is set) of the source file changes.
+    
+    Parameters:
+        path (str): Path to the CSV file.
+        cache_dir (str | None): Directory of the cache, None to always parse the CSV.
+        hash_contents (bool): Validate the cache against a hash of the file contents as well.
+
+    Returns:
+        pd.DataFrame: Cleaned market data.
+    """
+
+    if cache_dir is None:
+        return modify_data(pd.read_csv(path).dropna())
+
+    signature = file_signature(path, hash_contents)
+    name = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.blake2b(signature['path'].encode(), digest_size=4).hexdigest()
+    cache_path = os.path.join(cache_dir, f'{name}-{key}')
+    signature_path = os.path.join(cache_path, 'source.json')
+
+    if os.path.exists(signature_path):
+        with open(signature_path) as f:
+            if json.load(f) == signature:
+                return load_columns(cache_path)
+
+    data = modify_data(pd.read_csv(path).dropna())
+
+    save_columns(data, cache_path)
+    with open(signature_path, 'w') as f:
+        json.dump(signature, f)
+
+    return data
+
 def split(data: pd.DataFrame):
     """
     Split the data into training, testing, and validation sets.
@@ -41,41 +161,73 @@ def split(data: pd.DataFrame):
 
     return train, test, validation
 
-def returns_table(portfolio, data):
+# Resample rules of the periods available in the returns table
+RETURN_PERIODS = {
+    'Daily': 'D',
+    'Weekly': 'W',
+    'Monthly': 'ME',
+    'Quarterly': 'QE',
+    'Annually': 'YE',
+}
+
+def period_returns(portfolio, datetimes, rule: str):
+    """
+    Compound the returns of one or many portfolios over calendar periods.
+
+    The compounded return of a period is the ratio of the portfolio value at its last bar to
+    the value at the last bar of the previous period (the first bar for the first period), so
+    every period takes one vectorized division. Periods without bars have a return of 0.
+
+    Parameters:
+        portfolio (array-like): Portfolio values, shape (n_bars,) or (n_portfolios, n_bars).
+        datetimes (pd.DatetimeIndex): Time of every bar, in ascending order.
+        rule (str): Pandas resample rule of the periods (e.g. 'D', 'W', 'ME').
+
+    Returns:
+        tuple: Period end labels (pd.DatetimeIndex) and returns, shape (n_portfolios, n_periods).
+    """
+
+    values = np.atleast_2d(np.asarray(portfolio, dtype=float))
+
+    # Position of the last bar of every period, NaN for empty periods
+    ends = pd.Series(np.arange(len(datetimes)), index=datetimes).resample(rule).max()
+    filled = ends.notna().to_numpy()
+    end_index = ends.to_numpy()[filled].astype(np.int64)
+    start_index = np.concatenate(([0], end_index[:-1]))
+
+    returns = np.zeros((len(values), len(ends)))
+    returns[:, filled] = values[:, end_index] / values[:, start_index] - 1
+
+    return ends.index, returns
+
+def returns_table(portfolio, data, periods=('Monthly', 'Quarterly', 'Annually')):
     """
     Generate a returns table showing monthly, quarterly, and annual returns.
     
     Parameters:
-        portfolio (list or pd.Series): Portfolio values over time.
+        portfolio (list, pd.Series or np.ndarray): Portfolio values over time, or a 2-D array with one portfolio per row.
         data (pd.DataFrame): Market data with datetime information.
+        periods (tuple): Names of the periods to include, keys of RETURN_PERIODS.
 
     Returns:
-        pd.DataFrame: DataFrame containing monthly, quarterly, and annual returns.
+        pd.DataFrame: DataFrame containing the returns of each period, with (period, portfolio)
+        columns for a 2-D input.
     """
     
-    portfolio = pd.DataFrame({'Datetime': data['Datetime'].iloc[-len(portfolio):].reset_index(drop=True), 'Portfolio Value': portfolio})
-
-    # Ensure Datetime is index and correct type
-    portfolio = portfolio.copy()
-    portfolio['Datetime'] = pd.to_datetime(portfolio['Datetime'])
-    portfolio = portfolio.set_index('Datetime')
-
-    # Calculate daily returns
-    portfolio['Returns'] = portfolio['Portfolio Value'].pct_change()
+    values = np.asarray(portfolio, dtype=float)
+    datetimes = pd.DatetimeIndex(pd.to_datetime(data['Datetime'].iloc[-values.shape[-1]:]))
 
-    # Transform daily returns to monthly, quarterly, annually
-    monthly = portfolio['Returns'].resample('ME').apply(lambda x: (1 + x).prod() - 1)
-    quarterly = portfolio['Returns'].resample('QE').apply(lambda x: (1 + x).prod() - 1)
-    annually = portfolio['Returns'].resample('YE').apply(lambda x: (1 + x).prod() - 1)
+    # One column per period and portfolio, aligned on the union of the period ends
+    columns = {}
+    for name in periods:
+        index, returns = period_returns(values, datetimes, RETURN_PERIODS[name])
+        for i, row in enumerate(returns):
+            columns[(name, i)] = pd.Series(row, index=index)
 
-    # Combine into a single DataFrame
-    table = pd.DataFrame({
-        "Monthly": monthly,
-        "Quarterly": quarterly,
-        "Annually": annually
-    })
+    table = pd.DataFrame(columns).fillna(0)
+    table.index.name = 'Datetime'
 
-    # Fill NaN values with 0
-    table = table.fillna(0)
+    if values.ndim == 1:
+        table.columns = table.columns.droplevel(1)
 
-    return table
\ No newline at end of file
+    return table